@@ -0,0 +1,162 @@
+"""
+aggregates.py
+
+County and centre aggregates shared by the dashboard and the query API.
+
+Every builder takes the loaded source DataFrames and returns a new frame,
+so the same code produces the full-data aggregates drawn by dash_app.py and
+the filtered ones served by query_api.py.
+"""
+
+import re
+
+import pandas as pd
+
+NATIONAL_CENTRE = "All driving test centres"
+
+MONTH_ORDER = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+
+# Extract county (consistent with multiple scripts)
+def extract_county(text):
+    match = re.search(r"Co\.?\s+([A-Za-z]+)", str(text))
+    return match.group(1) if match else None
+
+
+def add_county(df: pd.DataFrame) -> pd.DataFrame:
+    df["County"] = df["Driving Test Centre"].apply(extract_county)
+    return df
+
+
+def filter_tests(df: pd.DataFrame, year_from: int = None, year_to: int = None,
+                 category: str = None, county: str = None, centre: str = None) -> pd.DataFrame:
+    """Restrict ROA30-style rows to a year range, category, county and centre."""
+    mask = pd.Series(True, index=df.index)
+    if year_from is not None or year_to is not None:
+        year = pd.to_numeric(df["Month"].str[:4], errors="coerce")
+        if year_from is not None:
+            mask &= year >= year_from
+        if year_to is not None:
+            mask &= year <= year_to
+    if category is not None:
+        mask &= df["Driving Test Categories"] == category
+    if county is not None:
+        mask &= df["County"] == county
+    if centre is not None:
+        mask &= df["Driving Test Centre"] == centre
+    return df[mask]
+
+
+# -----------------------------
+# Pass rate per county
+# -----------------------------
+def county_pass_rate(df_driving: pd.DataFrame) -> pd.DataFrame:
+    return (
+        df_driving
+        .dropna(subset=["Pass Rate", "County"])
+        .groupby("County", as_index=False, observed=True)["Pass Rate"]
+        .mean()
+    )
+
+
+# -----------------------------
+# Average age per county
+# -----------------------------
+def county_average_age(df_age: pd.DataFrame) -> pd.DataFrame:
+    df_age = df_age.assign(County=(
+        df_age["County and State"]
+        .str.replace(" City", "", regex=False)
+        .str.replace(" County", "", regex=False)
+        .str.strip()
+    ))
+    return (
+        df_age
+        .dropna(subset=["County", "VALUE"])
+        .groupby("County", as_index=False, observed=True)["VALUE"]
+        .mean()
+    )
+
+
+# -----------------------------
+# Prepare population data
+# -----------------------------
+def population_by_county(df_population: pd.DataFrame) -> dict:
+    county = df_population["County"].str.replace("Co. ", "", regex=False)
+    population = df_population["VALUE"] * 1000  # Convert from thousands
+    return population[county != "Ireland"].set_axis(county[county != "Ireland"]).to_dict()
+
+
+# -----------------------------
+# County test counts with population normalization
+# -----------------------------
+def county_test_counts(df_driving: pd.DataFrame, population_lookup: dict) -> pd.DataFrame:
+    county_tests = (
+        df_driving
+        .dropna(subset=["County", "Number of Tests"])
+        .groupby("County", as_index=False, observed=True)["Number of Tests"]
+        .sum()
+    )
+    county_tests["Population"] = county_tests["County"].map(population_lookup)
+    county_tests = county_tests.dropna(subset=["Population"])
+    county_tests["Tests_per_1000"] = (county_tests["Number of Tests"] / county_tests["Population"]) * 1000
+    return county_tests
+
+
+# -----------------------------
+# Merge for scatter Age vs Pass Rate with population
+# -----------------------------
+def age_vs_pass_rate(county_pass: pd.DataFrame, county_age: pd.DataFrame,
+                     population_lookup: dict) -> pd.DataFrame:
+    merged_age_pass = pd.merge(county_pass, county_age, on="County", how="inner")
+    merged_age_pass["Population"] = merged_age_pass["County"].map(population_lookup)
+    merged_age_pass = merged_age_pass.dropna(subset=["Population"])
+    merged_age_pass = merged_age_pass.rename(columns={"VALUE": "Average_Age"})
+
+    # Calculate normalized opacity based on population (0.3 to 1.0 range);
+    # with a single county (or equal populations) there is nothing to scale by
+    min_pop = merged_age_pass["Population"].min()
+    max_pop = merged_age_pass["Population"].max()
+    if max_pop > min_pop:
+        merged_age_pass["Opacity"] = 0.3 + 0.7 * (merged_age_pass["Population"] - min_pop) / (max_pop - min_pop)
+    else:
+        merged_age_pass["Opacity"] = 1.0
+    return merged_age_pass
+
+
+# -----------------------------
+# Merge for Pass Rate vs Number of Tests (county) with population normalization
+# -----------------------------
+def pass_rate_vs_tests(county_pass: pd.DataFrame, county_tests: pd.DataFrame,
+                       population_lookup: dict) -> pd.DataFrame:
+    county_pass_tests = pd.merge(county_pass, county_tests, on="County", how="inner")
+    county_pass_tests["Population"] = county_pass_tests["County"].map(population_lookup)
+    county_pass_tests = county_pass_tests.dropna(subset=["Population"])
+    county_pass_tests = county_pass_tests[county_pass_tests["Number of Tests"] >= 50].copy()
+
+    # Calculate normalized metrics per thousand population
+    county_pass_tests["Tests_per_1000"] = (county_pass_tests["Number of Tests"] / county_pass_tests["Population"]) * 1000
+    return county_pass_tests
+
+
+# -----------------------------
+# Monthly pass rates per year
+# -----------------------------
+def monthly_pass_rates(df_monthly: pd.DataFrame) -> pd.DataFrame:
+    """Mean pass rate per year and calendar month of the given ROA30 rows."""
+    df_monthly = df_monthly.copy()
+    df_monthly["Year"] = df_monthly["Month"].str.split().str[0]
+    df_monthly["Month_Name"] = df_monthly["Month"].str.split().str[1]
+    df_monthly["Month_Num"] = pd.Categorical(
+        df_monthly["Month_Name"],
+        categories=MONTH_ORDER,
+        ordered=True
+    )
+    return (
+        df_monthly
+        .groupby(["Year", "Month_Num"], observed=True)["Pass Rate"]
+        .mean()
+        .reset_index()
+    )
@@ -0,0 +1,184 @@
+"""
+anomalies.py
+
+Flags unexpected jumps in the monthly pass rate and test volume of every
+driving test centre in the ROA30 data.
+
+For each test category the data is pivoted into a centre x month matrix and
+two robust scores are computed for all centres at once:
+- a rolling robust z-score: each month against the median/MAD of the
+  previous ROLLING_WINDOW months of the same centre
+- a seasonal residual z-score: each month after removing the centre's level
+  and its calendar-month profile, scaled by the MAD of the residuals
+
+A point is flagged when both scores exceed the threshold, i.e. the value is
+out of line with recent history and not explained by the usual seasonality.
+
+Usage: python anomalies.py [n_synthetic_centres]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+CENTRE_COL = "Driving Test Centre"
+CATEGORY_COL = "Driving Test Categories"
+MONTH_COL = "Month"
+METRICS = ["Pass Rate", "Number of Tests"]
+NATIONAL_CENTRE = "All driving test centres"
+
+ROLLING_WINDOW = 12
+MIN_PERIODS = 6
+THRESHOLD = 3.5
+
+# Scales a MAD to be comparable with a standard deviation for normal data
+MAD_SCALE = 1.4826
+
+
+def parse_months(months: pd.Series) -> pd.Series:
+    # ROA30 months look like "2021 January"
+    if isinstance(months.dtype, pd.CategoricalDtype):
+        # to_datetime would keep the categorical, which sorts by category
+        # order rather than by date; parse each category once instead
+        dates = pd.to_datetime(months.cat.categories, format="%Y %B")
+        return months.cat.rename_categories(dates).astype(dates.dtype)
+    return pd.to_datetime(months, format="%Y %B")
+
+
+def centre_month_matrix(df: pd.DataFrame, category: str, value_col: str) -> pd.DataFrame:
+    """Pivot one category of the ROA30 data into a centre x month matrix."""
+    d = df[(df[CATEGORY_COL] == category) & (df[CENTRE_COL] != NATIONAL_CENTRE)]
+    matrix = d.pivot_table(
+        index=CENTRE_COL,
+        columns=parse_months(d[MONTH_COL]),
+        values=value_col,
+        aggfunc="mean",
+        dropna=False,
+    )
+    return matrix.sort_index(axis=1)
+
+
+def _nanmedian(values: np.ndarray, axis: int = -1, keepdims: bool = False) -> np.ndarray:
+    # np.nanmedian falls back to slow per-slice work; sorting pushes NaNs to
+    # the end so the median can be picked straight from each slice's count.
+    ordered = np.sort(np.moveaxis(values, axis, -1), axis=-1)
+    count = np.sum(~np.isnan(ordered), axis=-1, keepdims=True)
+    lo = np.take_along_axis(ordered, np.maximum(count - 1, 0) // 2, axis=-1)
+    hi = np.take_along_axis(ordered, count // 2 - (count == 0), axis=-1)
+    median = np.where(count > 0, (lo + hi) / 2, np.nan)
+    return np.moveaxis(median, -1, axis) if keepdims else median[..., 0]
+
+
+def _robust_z(values: np.ndarray, centre: np.ndarray, mad: np.ndarray) -> np.ndarray:
+    scale = MAD_SCALE * mad
+    # A flat history (MAD of 0) gives no basis for a score
+    scale = np.where(scale > 0, scale, np.nan)
+    return (values - centre) / scale
+
+
+def rolling_robust_z(values: np.ndarray, window: int = ROLLING_WINDOW,
+                     min_periods: int = MIN_PERIODS) -> np.ndarray:
+    """Score each month against the median/MAD of the previous `window` months.
+
+    `values` is a (centres, months) array; NaNs are ignored.
+    """
+    n_rows = values.shape[0]
+    padded = np.concatenate([np.full((n_rows, window), np.nan), values], axis=1)
+    # history[:, t, :] holds the `window` months before month t
+    history = sliding_window_view(padded, window, axis=1)[:, :-1, :]
+
+    median = _nanmedian(history, axis=2)
+    mad = _nanmedian(np.abs(history - median[..., None]), axis=2)
+
+    z = _robust_z(values, median, mad)
+    z[np.sum(~np.isnan(history), axis=2) < min_periods] = np.nan
+    return z
+
+
+def seasonal_residual_z(values: np.ndarray, month_of_year: np.ndarray) -> np.ndarray:
+    """Robust z-score of what is left after removing level and seasonality.
+
+    `month_of_year` gives the calendar month (1-12) of every column.
+    """
+    level = _nanmedian(values, axis=1, keepdims=True)
+    deviation = values - level
+
+    # One-hot (months x 12) so every calendar-month profile is built at once
+    onehot = month_of_year[:, None] == np.arange(1, 13)[None, :]
+    stacked = np.where(onehot[None, :, :], deviation[:, :, None], np.nan)
+    seasonal = np.nan_to_num(_nanmedian(stacked, axis=1))[:, month_of_year - 1]
+
+    residual = deviation - seasonal
+    centre = _nanmedian(residual, axis=1, keepdims=True)
+    mad = _nanmedian(np.abs(residual - centre), axis=1, keepdims=True)
+
+    return _robust_z(residual, centre, mad)
+
+
+def score_matrix(matrix: pd.DataFrame, threshold: float = THRESHOLD) -> pd.DataFrame:
+    """Score a centre x month matrix and return one row per flagged point."""
+    values = matrix.to_numpy(dtype=float)
+    months = pd.DatetimeIndex(matrix.columns)
+
+    z_roll = rolling_robust_z(values)
+    z_seas = seasonal_residual_z(values, months.month.to_numpy())
+
+    flagged = (np.abs(z_roll) > threshold) & (np.abs(z_seas) > threshold)
+    rows, cols = np.nonzero(flagged)
+
+    return pd.DataFrame({
+        CENTRE_COL: matrix.index.to_numpy()[rows],
+        MONTH_COL: months[cols],
+        "Value": values[rows, cols],
+        "Rolling_Z": z_roll[rows, cols],
+        "Seasonal_Z": z_seas[rows, cols],
+    })
+
+
+def detect_anomalies(df: pd.DataFrame, threshold: float = THRESHOLD) -> pd.DataFrame:
+    """Flag anomalous months for every centre, category and metric."""
+    frames = []
+    for category in sorted(df[CATEGORY_COL].dropna().unique()):
+        for metric in METRICS:
+            flagged = score_matrix(centre_month_matrix(df, category, metric), threshold)
+            flagged.insert(1, CATEGORY_COL, category)
+            flagged.insert(2, "Metric", metric)
+            frames.append(flagged)
+
+    anomalies = pd.concat(frames, ignore_index=True)
+    return anomalies.sort_values([MONTH_COL, CENTRE_COL]).reset_index(drop=True)
+
+
+def synthetic_matrix(n_centres: int, n_months: int = 58, seed: int = 0) -> pd.DataFrame:
+    """Seasonal pass-rate-like series with a few injected jumps, for timing."""
+    rng = np.random.default_rng(seed)
+    months = pd.date_range("2021-01-01", periods=n_months, freq="MS")
+    level = rng.uniform(45, 75, size=(n_centres, 1))
+    season = 3 * np.sin(2 * np.pi * (months.month.to_numpy() - 1) / 12)
+    values = level + season + rng.normal(0, 1.5, size=(n_centres, n_months))
+
+    jumps = rng.random(values.shape) < 0.002
+    values[jumps] += rng.choice([-20, 20], size=jumps.sum())
+    values[rng.random(values.shape) < 0.02] = np.nan
+
+    return pd.DataFrame(values, index=[f"Centre {i}" for i in range(n_centres)], columns=months)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    matrix = synthetic_matrix(n)
+
+    start = time.perf_counter()
+    flagged = score_matrix(matrix)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {n} synthetic centres x {matrix.shape[1]} months in {elapsed:.3f}s, "
+          f"{len(flagged)} anomalies flagged")
+
+    roa30 = Path(__file__).resolve().parent.parent / "ROA30.20251112T121150_cleaned.csv"
+    anomalies = detect_anomalies(pd.read_csv(roa30))
+    print(f"ROA30: {len(anomalies)} anomalies flagged")
+    print(anomalies.tail(20).to_string(index=False))
@@ -0,0 +1,161 @@
+"""
+build_report.py
+
+Renders every dashboard view into one self-contained, offline HTML file for
+readers who can't reach a running server.
+
+Compared with saving each figure as standalone HTML the bundle
+- includes plotly.js once instead of once per figure
+- stores the ie.json county geometry once (coordinates rounded to
+  GEO_DECIMALS places, about 1 m) and shares it between all choropleths
+- gzips the figure data and geometry and embeds it as base64; the browser
+  inflates it with the built-in DecompressionStream
+- only draws the first tab on open; other tabs are drawn on first click
+
+Output: dashboard_report.html (next to the data files)
+
+Usage: python build_report.py [output.html]
+"""
+
+import base64
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from tabs import TABS
+
+OUTPUT = Path(__file__).resolve().parent.parent / "dashboard_report.html"
+GEO_DECIMALS = 5
+
+TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Driving Test Analytics Report</title>
+<style>
+  body {{ font-family: sans-serif; margin: 0; }}
+  header {{ background: linear-gradient(90deg, #232b91, #00f9ff); color: white;
+           padding: 18px 24px; text-align: center; }}
+  header h1 {{ margin: 0; }}
+  nav {{ display: flex; flex-wrap: wrap; border-bottom: 1px solid #d6d6d6; }}
+  nav button {{ flex: 1; padding: 12px; border: none; background: #f9f9f9; cursor: pointer; }}
+  nav button.active {{ background: white; border-top: 2px solid #232b91; font-weight: 600; }}
+  .view {{ display: none; height: 700px; }}
+  .view.active {{ display: block; }}
+</style>
+<script>{plotlyjs}</script>
+</head>
+<body>
+<header><h1>Driving Test Analytics Dashboard</h1>
+<div>Static report of driving test pass rates and related metrics</div></header>
+<nav id="tabs"></nav>
+<main id="views"></main>
+<script id="report-data" type="application/octet-stream">{payload}</script>
+<script>
+(async () => {{
+  const b64 = document.getElementById("report-data").textContent.trim();
+  const bytes = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+  const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+  const report = await new Response(stream).json();
+
+  const drawn = new Set();
+  const show = (i) => {{
+    document.querySelectorAll("nav button, .view").forEach(el => el.classList.remove("active"));
+    document.getElementById("tab-" + i).classList.add("active");
+    const view = document.getElementById("view-" + i);
+    view.classList.add("active");
+    if (!drawn.has(i)) {{
+      const fig = report.views[i].figure;
+      // Choropleths share the one copy of the county geometry
+      for (const t of report.views[i].geo_traces) fig.data[t].geojson = report.geojson;
+      Plotly.newPlot(view, fig.data, fig.layout, {{responsive: true}});
+      drawn.add(i);
+    }}
+  }};
+
+  report.views.forEach((v, i) => {{
+    const button = document.createElement("button");
+    button.id = "tab-" + i;
+    button.textContent = v.label;
+    button.onclick = () => show(i);
+    document.getElementById("tabs").appendChild(button);
+    const view = document.createElement("div");
+    view.id = "view-" + i;
+    view.className = "view";
+    document.getElementById("views").appendChild(view);
+  }});
+  show(0);
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+def round_coordinates(coords, decimals: int = GEO_DECIMALS):
+    if isinstance(coords[0], (int, float)):
+        return [round(c, decimals) for c in coords]
+    return [round_coordinates(c, decimals) for c in coords]
+
+
+def shared_geojson(geojson: dict) -> dict:
+    features = [
+        {
+            "type": "Feature",
+            "properties": f["properties"],
+            "geometry": {
+                "type": f["geometry"]["type"],
+                "coordinates": round_coordinates(f["geometry"]["coordinates"]),
+            },
+        }
+        for f in geojson["features"]
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def build_payload() -> dict:
+    # Imported here, not at the top: the forecast's spawned pool workers
+    # re-import this script and must not load all the data again
+    import dashboard_data
+
+    views = []
+    for value, label in TABS:
+        figure = json.loads(pio.to_json(dashboard_data.FIGURES[value], validate=False))
+        geo_traces = []
+        for i, trace in enumerate(figure["data"]):
+            if "geojson" in trace:
+                del trace["geojson"]
+                geo_traces.append(i)
+        views.append({"label": label, "figure": figure, "geo_traces": geo_traces})
+    return {"views": views, "geojson": shared_geojson(dashboard_data.geojson)}
+
+
+def build_report(output: Path = OUTPUT) -> int:
+    payload = json.dumps(build_payload(), separators=(",", ":")).encode("utf-8")
+    packed = base64.b64encode(gzip.compress(payload, 9)).decode("ascii")
+    html = TEMPLATE.format(plotlyjs=get_plotlyjs(), payload=packed)
+    Path(output).write_text(html, encoding="utf-8")
+    return len(html.encode("utf-8"))
+
+
+def standalone_size() -> int:
+    """Total size of saving every view as its own standalone HTML file."""
+    import dashboard_data
+
+    return sum(
+        len(pio.to_html(dashboard_data.FIGURES[value], include_plotlyjs=True, full_html=True).encode("utf-8"))
+        for value, _ in TABS
+    )
+
+
+if __name__ == "__main__":
+    output = Path(sys.argv[1]) if len(sys.argv) > 1 else OUTPUT
+    size = build_report(output)
+    separate = standalone_size()
+    print(f"Wrote {output} ({size / 1e6:.2f} MB)")
+    print(f"Standalone HTML per view would be {separate / 1e6:.2f} MB in total "
+          f"({size / separate:.1%} of that)")
@@ -0,0 +1,128 @@
+"""
+callback_cache.py
+
+Disk-backed memoization of Dash callback results, shared by every worker
+process on a host and kept across restarts.
+
+Results are stored as compressed JSON in a SQLite file (WAL mode, so many
+processes can read and write it at once) keyed by a hash of the callback
+name, its normalized inputs and a data version. The data version is
+derived from the size and modification time of the input files and code,
+so editing either makes old entries unreachable. The total stored size is
+bounded; the least recently used entries are evicted first.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from functools import wraps
+from pathlib import Path
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / ".cache" / "callbacks.sqlite"
+MAX_BYTES = 256 * 1024 * 1024
+# A hit only records its access time when the stored one is older than this,
+# so reads don't all queue up for the write lock
+TOUCH_INTERVAL = 60
+
+# Bump to invalidate every entry after a change the data version can't see
+CACHE_VERSION = 1
+
+
+def data_version(paths) -> str:
+    """Fingerprint of the given files (size and mtime), cheap enough for every startup."""
+    h = hashlib.sha1(str(CACHE_VERSION).encode())
+    for path in sorted(map(Path, paths)):
+        st = path.stat()
+        h.update(f"{path.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:16]
+
+
+def normalize(value):
+    """Make equivalent callback inputs hash the same ("" and None, 2021.0 and 2021, ...)."""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in sorted(value.items())}
+    return value
+
+
+class DiskCache:
+    """Size-bounded LRU of JSON-serializable values in a SQLite file."""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes: int = MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+                " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)")
+            db.commit()
+
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across threads
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def make_key(name: str, args, version: str) -> str:
+        payload = json.dumps([name, normalize(list(args)), version], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str):
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT value, last_access FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL:
+                db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                db.commit()
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, key: str, value):
+        blob = zlib.compress(json.dumps(value).encode(), 6)
+        with closing(self._connect()) as db:
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            # Keep the most recently used entries that fit in max_bytes
+            db.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_access DESC) AS running"
+                " FROM entries) WHERE running > ?)",
+                (self.max_bytes,),
+            )
+            db.commit()
+
+    def memoize(self, version: str):
+        """Decorator caching a function's JSON-serializable result by its arguments."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args):
+                key = self.make_key(func.__qualname__, args, version)
+                value = self.get(key)
+                if value is None:
+                    value = func(*args)
+                    if value is not None:
+                        self.set(key, value)
+                return value
+            return wrapper
+        return decorator
+
+
+def default_cache() -> DiskCache:
+    return DiskCache(os.environ.get("DASH_CACHE_PATH", DEFAULT_PATH))
@@ -1,285 +1,76 @@
-import re
-import json
-from pathlib import Path
+"""
+dash_app.py
 
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from dash import Dash, dcc, html, Input, Output
+Driving Test Analytics Dashboard. The data and figures live in
+dashboard_data.py; this module holds the layout, callbacks and routes.
 
-# ======================================================
-# 1. LOAD ALL DATA (mirror your script logic)
-# ======================================================
+Usage: python dash_app.py [--fast-start]
 
-BASE_DIR = Path(__file__).resolve().parent.parent
+With --fast-start (or DASH_FAST_START=1) pandas, plotly.express,
+statsmodels and all data loading are deferred until the first page view or
+API request, so the server comes up and answers /healthz straight away.
+"""
 
-# Main datasets
-driving_path = BASE_DIR / "driving_test_data.csv"
-age_path = BASE_DIR / "Average_Age_Per_County.cleaned.csv"
-geo_path = BASE_DIR / "ie.json"
-driving_monthly_path = BASE_DIR / "ROA30.20251112T121150_cleaned.csv"
-population_path = BASE_DIR / "PEA08.20251203T161259.csv"
-
-df_driving = pd.read_csv(driving_path)
-df_age = pd.read_csv(age_path)
-df_population = pd.read_csv(population_path)
-
-# Extract county (consistent with multiple scripts)
-def extract_county(text):
-    match = re.search(r"Co\.?\s+([A-Za-z]+)", str(text))
-    return match.group(1) if match else None
-
-df_driving["County"] = df_driving["Driving Test Centre"].apply(extract_county)
-
-# -----------------------------
-# Pass rate per county
-# -----------------------------
-county_pass = (
-    df_driving
-    .dropna(subset=["Pass Rate", "County"])
-    .groupby("County", as_index=False)["Pass Rate"]
-    .mean()
-)
+import json
+import os
+import sys
+from pathlib import Path
+from urllib.parse import urlencode
 
-# -----------------------------
-# Average age per county
-# -----------------------------
-df_age["County"] = (
-    df_age["County and State"]
-    .str.replace(" City", "", regex=False)
-    .str.replace(" County", "", regex=False)
-    .str.strip()
-)
+from dash import Dash, Patch, dcc, html, Input, Output, State
+from dash.exceptions import PreventUpdate
 
-county_age = (
-    df_age
-    .dropna(subset=["County", "VALUE"])
-    .groupby("County", as_index=False)["VALUE"]
-    .mean()
-)
+from callback_cache import data_version, default_cache
+from export import register_export
+from geo_index import geo_ranges
+from query_api import AGGREGATES, register_query_api
+from tabs import TABS
 
-# -----------------------------
-# County test counts with population normalization
-# -----------------------------
-df_driving_tests = df_driving.dropna(subset=["County", "Number of Tests"])
-county_tests = (
-    df_driving_tests
-    .groupby("County", as_index=False)["Number of Tests"]
-    .sum()
-)
+FAST_START = "--fast-start" in sys.argv or os.environ.get("DASH_FAST_START") == "1"
 
-# -----------------------------
-# Prepare population data
-# -----------------------------
-df_population['County'] = df_population['County'].str.replace('Co. ', '', regex=False)
-df_population['Population'] = df_population['VALUE'] * 1000  # Convert from thousands
-population_lookup = df_population[df_population['County'] != 'Ireland'].set_index('County')['Population'].to_dict()
-
-# Add population data to county tests for the map
-county_tests['Population'] = county_tests['County'].map(population_lookup)
-county_tests = county_tests.dropna(subset=['Population'])
-county_tests['Tests_per_1000'] = (county_tests['Number of Tests'] / county_tests['Population']) * 1000
-
-# -----------------------------
-# Merge for scatter Age vs Pass Rate with population
-# -----------------------------
-merged_age_pass = pd.merge(county_pass, county_age, on="County", how="inner")
-merged_age_pass['Population'] = merged_age_pass['County'].map(population_lookup)
-merged_age_pass = merged_age_pass.dropna(subset=['Population'])
-merged_age_pass = merged_age_pass.rename(columns={"VALUE": "Average_Age"})
-
-# Calculate normalized opacity based on population (0.3 to 1.0 range)
-min_pop = merged_age_pass['Population'].min()
-max_pop = merged_age_pass['Population'].max()
-merged_age_pass['Opacity'] = 0.3 + 0.7 * (merged_age_pass['Population'] - min_pop) / (max_pop - min_pop)
-
-# -----------------------------
-# Merge for Pass Rate vs Number of Tests (county) with population normalization
-# -----------------------------
-county_pass_tests = pd.merge(county_pass, county_tests, on="County", how="inner")
-county_pass_tests['Population'] = county_pass_tests['County'].map(population_lookup)
-county_pass_tests = county_pass_tests.dropna(subset=['Population'])
-county_pass_tests = county_pass_tests[county_pass_tests['Number of Tests'] >= 50]
-
-# Calculate normalized metrics per thousand population
-county_pass_tests['Tests_per_1000'] = (county_pass_tests['Number of Tests'] / county_pass_tests['Population']) * 1000
 
+def get_data():
+    """The dashboard_data module, importing (i.e. loading everything) on first call."""
+    import dashboard_data
+    return dashboard_data
 
-# ======================================================
-# 2. LOAD GEOJSON (SimpleMaps Ireland)
-# ======================================================
 
-with open(geo_path, "r") as f:
-    geojson = json.load(f)
+def data_loaded() -> bool:
+    # dashboard_data is in sys.modules while it is still importing
+    return hasattr(sys.modules.get("dashboard_data"), "FIGURES")
 
-GEO_KEY = "name"  # simplemaps property key
 
-def geo_key_clean(x):
-    return str(x).title().strip()
+# Spawned worker processes (the forecast's process pool) re-import this
+# script as __mp_main__ and don't need the data
+if not FAST_START and __name__ != "__mp_main__":
+    get_data()
 
-county_pass["County_key"] = county_pass["County"].apply(geo_key_clean)
-county_age["County_key"] = county_age["County"].apply(geo_key_clean)
-county_tests["County_key"] = county_tests["County"].apply(geo_key_clean)
+# Rendered figures are shared by all workers through an on-disk cache
+# (see callback_cache.py); the version changes with the data files and code.
+# *.json covers ie.json and the JSON-stat exports loaders.py prefers to the CSVs
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_VERSION = data_version([*BASE_DIR.glob("*.csv"), *BASE_DIR.glob("*.json"),
+                             *Path(__file__).resolve().parent.glob("*.py")])
+figure_cache = default_cache()
 
 
 # ======================================================
-# 3. PREBUILD ALL FIGURES
+# 1. DASH APP LAYOUT (TABS)
 # ======================================================
 
-# ------------------------------------------------------
-# FIG 1: Scatter — Pass Rate vs Average Age (Population Normalized)
-# ------------------------------------------------------
-fig_scatter_age = px.scatter(
-    merged_age_pass,
-    x="Average_Age",
-    y="Pass Rate",
-    hover_data=["County", "Population"],
-    labels={
-        "Average_Age": "Average Age",
-        "Pass Rate": "Pass Rate (%)"
-    },
-    title="Pass Rate vs Average Age by County (Opacity = Population)",
-    trendline="ols"
-)
-
-# Update marker opacity based on population
-fig_scatter_age.update_traces(marker=dict(opacity=merged_age_pass['Opacity']))
-fig_scatter_age.update_layout(margin=dict(l=20, r=20, t=40, b=20))
-
-# ------------------------------------------------------
-# FIG 2: Pass Rate Choropleth Map
-# ------------------------------------------------------
-fig_pass_map = px.choropleth(
-    county_pass,
-    geojson=geojson,
-    locations="County_key",
-    featureidkey=f"properties.{GEO_KEY}",
-    color="Pass Rate",
-    color_continuous_scale="Viridis",
-    title="Driving Test Pass Rate by County"
-)
-fig_pass_map.update_geos(fitbounds="geojson", visible=False)
-fig_pass_map.update_layout(margin=dict(l=0, r=0, t=50, b=0))
-
-# ------------------------------------------------------
-# FIG 3: Average Age Map
-# ------------------------------------------------------
-fig_age_map = px.choropleth(
-    county_age,
-    geojson=geojson,
-    locations="County_key",
-    featureidkey=f"properties.{GEO_KEY}",
-    color="VALUE",
-    color_continuous_scale="Viridis",
-    labels={"VALUE": "Average Age"},
-    title="Average Age by County"
-)
-fig_age_map.update_geos(fitbounds="geojson", visible=False)
-fig_age_map.update_layout(margin=dict(l=0, r=0, t=50, b=0))
-
-# ------------------------------------------------------
-# FIG 4: Tests per 1,000 Population Map
-# (from tests_map.py - population normalized)
-# ------------------------------------------------------
-fig_tests_map = px.choropleth(
-    county_tests,
-    geojson=geojson,
-    locations="County_key",
-    featureidkey=f"properties.{GEO_KEY}",
-    color="Tests_per_1000",
-    color_continuous_scale="Blues",
-    labels={"Tests_per_1000": "Tests per 1,000 Population"},
-    hover_data={"Number of Tests": True, "Population": ":,.0f"},
-    title="Driving Tests per 1,000 Population by County"
-)
-fig_tests_map.update_geos(fitbounds="geojson", visible=False)
-fig_tests_map.update_layout(margin=dict(l=0, r=0, t=50, b=0))
-
-# ------------------------------------------------------
-# FIG 5: Pass Rate vs Tests per 1,000 Population (Population Normalized)
-# ------------------------------------------------------
-fig_pass_vs_tests = px.scatter(
-    county_pass_tests,
-    x="Tests_per_1000",
-    y="Pass Rate",
-    hover_data=["County", "Number of Tests", "Population"],
-    labels={
-        "Tests_per_1000": "Tests per 1,000 Population",
-        "Pass Rate": "Pass Rate (%)"
-    },
-    trendline="ols",
-    title="Pass Rate vs Tests per 1,000 Population by County"
-)
-
-# Update hover template for better information display
-fig_pass_vs_tests.update_traces(
-    hovertemplate='<b>%{customdata[0]}</b><br>' +
-                  'Tests per 1,000: %{x:.1f}<br>' +
-                  'Pass Rate: %{y:.1f}%<br>' +
-                  'Total Tests: %{customdata[1]:,}<br>' +
-                  'Population: %{customdata[2]:,.0f}<extra></extra>',
-    selector=dict(mode='markers')
-)
-fig_pass_vs_tests.update_layout(margin=dict(l=20, r=20, t=40, b=20))
-
-# ------------------------------------------------------
-# FIG 6: Monthly Pass Rates Over Time
-# (from visualize_pass_rates.py)
-# ------------------------------------------------------
-df_monthly = pd.read_csv(driving_monthly_path)
-
-df_monthly_filtered = df_monthly[df_monthly["Driving Test Centre"] == "All driving test centres"].copy()
+# The tab graph only exists once a tab is rendered
+app = Dash(__name__, suppress_callback_exceptions=True)
 
-df_monthly_filtered["Year"] = df_monthly_filtered["Month"].str.split().str[0]
-df_monthly_filtered["Month_Name"] = df_monthly_filtered["Month"].str.split().str[1]
+# JSON/CSV endpoints and streaming exports for the loaded data
+# (see query_api.py and export.py)
+register_query_api(app.server, lambda: get_data().sources)
+register_export(app.server, lambda: get_data().sources)
 
-month_order = [
-    "January","February","March","April","May","June",
-    "July","August","September","October","November","December"
-]
 
-df_monthly_filtered["Month_Num"] = pd.Categorical(
-    df_monthly_filtered["Month_Name"],
-    categories=month_order,
-    ordered=True
-)
-
-monthly_grouped = (
-    df_monthly_filtered
-    .groupby(["Year", "Month_Num"], observed=True)["Pass Rate"]
-    .mean()
-    .reset_index()
-)
-
-fig_monthly = go.Figure()
-
-years = sorted(monthly_grouped["Year"].unique())
-palette = px.colors.qualitative.Plotly
-
-for i, y in enumerate(years):
-    d = monthly_grouped[monthly_grouped["Year"] == y]
-    fig_monthly.add_trace(go.Scatter(
-        x=d["Month_Num"].astype(str),
-        y=d["Pass Rate"],
-        mode="lines+markers",
-        name=str(y),
-        line=dict(width=2, color=palette[i % len(palette)])
-    ))
-
-fig_monthly.update_layout(
-    title="Monthly Pass Rates by Year",
-    xaxis_title="Month",
-    yaxis_title="Pass Rate (%)",
-    margin=dict(l=20, r=20, t=40, b=20),
-    height=600
-)
-
-
-# ======================================================
-# 4. DASH APP LAYOUT (TABS)
-# ======================================================
+@app.server.route("/healthz")
+def healthz():
+    return {"status": "ok", "fast_start": FAST_START, "data_loaded": data_loaded()}
 
-app = Dash(__name__)
 
 # Header and footer styles: blue -> cyan gradient
 header_style = {
@@ -306,7 +97,18 @@ footer_style = {
     "zIndex": 1000,
 }
 
+export_button_style = {
+    "background": "#232b91",
+    "color": "white",
+    "padding": "8px 18px",
+    "borderRadius": "6px",
+    "textDecoration": "none",
+    "fontWeight": "600",
+}
+
 app.layout = html.Div([
+    dcc.Location(id="url"),
+
     # Header (gradient)
     html.Div([
         html.H1("Driving Test Analytics Dashboard", style={"margin": "0", "fontWeight": "700"}),
@@ -317,17 +119,33 @@ app.layout = html.Div([
     dcc.Tabs(
         id="tabs",
         value="tab_scatter_age",
-        children=[
-            dcc.Tab(label="Pass Rate vs Age", value="tab_scatter_age"),
-            dcc.Tab(label="Pass Rate Map", value="tab_pass_map"),
-            dcc.Tab(label="Average Age Map", value="tab_age_map"),
-            dcc.Tab(label="Tests Map", value="tab_tests_map"),
-            dcc.Tab(label="Pass Rate vs Tests", value="tab_pass_tests"),
-            dcc.Tab(label="Monthly Trends", value="tab_monthly"),
-        ]
+        children=[dcc.Tab(label=label, value=value) for value, label in TABS]
     ),
 
     html.Div(id="tab-content", style={"marginTop": "20px"}),
+    dcc.Store(id="zoomed-county"),
+
+    # Export filtered data (streamed by export.py)
+    html.Div([
+        html.Div([
+            html.Label("Years"),
+            dcc.RangeSlider(id="export-years", min=0, max=1, step=1, value=[0, 1]),
+        ], style={"flex": "2", "minWidth": "240px"}),
+        dcc.Dropdown(id="export-category", placeholder="All categories",
+                     style={"flex": "2", "minWidth": "220px"}),
+        dcc.Dropdown(id="export-county", placeholder="All counties",
+                     style={"flex": "1", "minWidth": "150px"}),
+        dcc.Dropdown(
+            id="export-dataset",
+            options=[{"label": "Filtered rows", "value": "rows"}] +
+                    [{"label": name, "value": name} for name in AGGREGATES],
+            value="rows", clearable=False, style={"flex": "1", "minWidth": "170px"},
+        ),
+        dcc.Dropdown(id="export-format", options=["csv", "parquet", "arrow"],
+                     value="csv", clearable=False, style={"width": "110px"}),
+        html.A("Export", id="export-link", download="", href="", style=export_button_style),
+    ], style={"display": "flex", "gap": "12px", "alignItems": "center", "flexWrap": "wrap",
+              "padding": "12px 24px", "marginBottom": "80px"}),
 
     # Footer (gradient)
     html.Div([
@@ -338,32 +156,151 @@ app.layout = html.Div([
 
 
 # ======================================================
-# 5. CALLBACK — Render correct figure per tab
+# 2. CALLBACK — Render correct figure per tab
 # ======================================================
 
+@figure_cache.memoize(DATA_VERSION)
+def tab_figure(tab):
+    """Figure JSON for a tab; a cache hit never touches the data."""
+    figure = get_data().FIGURES.get(tab)
+    return None if figure is None else json.loads(figure.to_json())
+
+
+# A new tab is drawn at full extent, so any map zoom is reset with it
 @app.callback(
     Output("tab-content", "children"),
-    Input("tabs", "value")
+    Output("zoomed-county", "data", allow_duplicate=True),
+    Input("tabs", "value"),
+    prevent_initial_call="initial_duplicate",
 )
 def render_tab(tab):
-    if tab == "tab_scatter_age":
-        return dcc.Graph(figure=fig_scatter_age, style={"height": "700px"})
-    elif tab == "tab_pass_map":
-        return dcc.Graph(figure=fig_pass_map, style={"height": "700px"})
-    elif tab == "tab_age_map":
-        return dcc.Graph(figure=fig_age_map, style={"height": "700px"})
-    elif tab == "tab_tests_map":
-        return dcc.Graph(figure=fig_tests_map, style={"height": "700px"})
-    elif tab == "tab_pass_tests":
-        return dcc.Graph(figure=fig_pass_vs_tests, style={"height": "700px"})
-    elif tab == "tab_monthly":
-        return dcc.Graph(figure=fig_monthly, style={"height": "700px"})
-    return html.Div("Tab not found.")
+    figure = tab_figure(tab)
+    if figure is None:
+        return html.Div("Tab not found."), None
+    graph = dcc.Graph(id="tab-graph", figure=figure, style={"height": "700px"})
+    if tab != "tab_correlations":
+        return graph, None
+
+    # The heatmap's axis labels are the metric names, so a cache hit needs no data
+    metrics = figure["data"][0]["x"]
+    return html.Div([
+        graph,
+        html.Div([
+            dcc.Dropdown(id="corr-x", options=metrics, value="Average Age", clearable=False,
+                         style={"flex": "1", "minWidth": "220px"}),
+            dcc.Dropdown(id="corr-y", options=metrics, value="Pass Rate", clearable=False,
+                         style={"flex": "1", "minWidth": "220px"}),
+        ], style={"display": "flex", "gap": "12px", "padding": "12px 24px"}),
+        dcc.Graph(id="corr-pair", style={"height": "600px"}),
+    ]), None
+
+
+MAP_TABS = {"tab_pass_map", "tab_age_map", "tab_tests_map"}
+
+
+# Clicking a county on a map zooms to it; clicking it again zooms back out.
+# The bounds come from the GeoJSON index, so only the axis ranges are sent.
+@app.callback(
+    Output("tab-graph", "figure"),
+    Output("zoomed-county", "data"),
+    Input("tab-graph", "clickData"),
+    State("tabs", "value"),
+    State("zoomed-county", "data"),
+    prevent_initial_call=True,
+)
+def zoom_to_county(click, tab, zoomed):
+    if tab not in MAP_TABS or not click:
+        raise PreventUpdate
+    point = click["points"][0]
+    county = point.get("location") or point.get("text")
+    geo_index = get_data().geo_index
+    if county not in geo_index:
+        raise PreventUpdate
+
+    if county == zoomed:
+        county = None
+    ranges = geo_ranges(geo_index, [county] if county else None)
+
+    figure = Patch()
+    figure["layout"]["geo"]["lonaxis"]["range"] = ranges["lonaxis_range"]
+    figure["layout"]["geo"]["lataxis"]["range"] = ranges["lataxis_range"]
+    figure["layout"]["geo"]["center"] = ranges["center"]
+    return figure, county
+
+
+@figure_cache.memoize(DATA_VERSION)
+def pair_figure(x, y):
+    return json.loads(get_data().correlation_pair(x, y).to_json())
+
+
+# Clicking a cell of the correlation matrix picks that pair for the drill-down
+@app.callback(
+    Output("corr-x", "value"),
+    Output("corr-y", "value"),
+    Input("tab-graph", "clickData"),
+    State("tabs", "value"),
+    prevent_initial_call=True,
+)
+def select_pair(click, tab):
+    if tab != "tab_correlations" or not click:
+        raise PreventUpdate
+    point = click["points"][0]
+    return point["x"], point["y"]
+
+
+@app.callback(
+    Output("corr-pair", "figure"),
+    Input("corr-x", "value"),
+    Input("corr-y", "value"),
+)
+def update_pair(x, y):
+    # Only metrics on the heatmap (the dropdown options); anything else is a stale or forged value
+    metrics = tab_figure("tab_correlations")["data"][0]["x"]
+    if x not in metrics or y not in metrics or x == y:
+        raise PreventUpdate
+    return pair_figure(x, y)
+
+
+# Export controls are filled on page load so fast-start never needs the
+# data just to serve the layout
+@app.callback(
+    Output("export-years", "min"),
+    Output("export-years", "max"),
+    Output("export-years", "value"),
+    Output("export-years", "marks"),
+    Output("export-category", "options"),
+    Output("export-county", "options"),
+    Input("url", "pathname"),
+)
+def populate_export_options(_):
+    data = get_data()
+    years = data.export_years
+    return (years[0], years[-1], [years[0], years[-1]], {y: str(y) for y in years},
+            data.export_categories, data.export_counties)
+
+
+@app.callback(
+    Output("export-link", "href"),
+    Input("export-dataset", "value"),
+    Input("export-format", "value"),
+    Input("export-years", "value"),
+    Input("export-category", "value"),
+    Input("export-county", "value"),
+)
+def update_export_link(dataset, fmt, years, category, county):
+    params = {"year_from": years[0], "year_to": years[1]}
+    if category:
+        params["category"] = category
+    if county:
+        params["county"] = county
+    return f"/export/{dataset}.{fmt}?{urlencode(params)}"
 
 
 # ======================================================
-# 6. RUN SERVER
+# 3. RUN SERVER
 # ======================================================
 
 if __name__ == "__main__":
+    if not FAST_START:
+        print("Data loaded in", ", ".join(f"{k} {v:.2f}s" for k, v in get_data().TIMINGS.items()))
     app.run(debug=True)
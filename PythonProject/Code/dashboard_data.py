@@ -0,0 +1,366 @@
+"""
+dashboard_data.py
+
+Loads every input and prebuilds the aggregates and figures shown by
+dash_app.py. All the work happens at import time, so importing this module
+is what "loading the dashboard" means; dash_app.py imports it either at
+startup or, in fast-start mode, on first use.
+
+TIMINGS records how long each startup phase took and LOAD_TIMINGS how long
+each (concurrent) load task ran (see startup_profile.py).
+
+With DASH_SHARED_STORE=<manifest> the data is not loaded here but attached
+from the shared memory published by shared_store.py.
+"""
+
+import os
+import time
+
+TIMINGS = {}
+_last = time.perf_counter()
+
+
+def _mark(phase):
+    global _last
+    now = time.perf_counter()
+    TIMINGS[phase] = now - _last
+    _last = now
+
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from aggregates import NATIONAL_CENTRE, filter_tests, monthly_pass_rates
+from anomalies import parse_months
+from geo_index import GEO_KEY, centroid_labels, geo_ranges, report_unmatched
+from loaders import load_all
+from shared_store import attach
+
+_mark("imports")
+
+# ======================================================
+# 1. LOAD ALL DATA (concurrently, see loaders.py)
+# ======================================================
+
+SHARED_STORE = os.environ.get("DASH_SHARED_STORE")
+
+if SHARED_STORE:
+    # Zero-copy views of the arrays another process loaded once for all workers
+    loaded, LOAD_TIMINGS = attach(SHARED_STORE), {}
+else:
+    loaded, LOAD_TIMINGS = load_all()
+_mark("load")
+
+df_driving = loaded["df_driving"]
+df_age = loaded["df_age"]
+df_monthly = loaded["df_monthly"]
+population_lookup = loaded["population_lookup"]
+
+# Pass rate, average age and test counts per county
+county_pass = loaded["county_pass"]
+county_age = loaded["county_age"]
+county_tests = loaded["county_tests"]
+
+# Merges for the two county scatter plots
+merged_age_pass = loaded["merged_age_pass"]
+county_pass_tests = loaded["county_pass_tests"]
+
+
+# ======================================================
+# 2. GEOJSON (SimpleMaps Ireland)
+# ======================================================
+
+geojson = loaded["geojson"]
+
+# Bounds, centroid and name of each county feature (see geo_index.py)
+geo_index = loaded["geo_index"]
+map_geos = dict(geo_ranges(geo_index), visible=False)
+map_labels = go.Scattergeo(**centroid_labels(geo_index))
+
+def geo_key_clean(x):
+    return str(x).title().strip()
+
+county_pass["County_key"] = county_pass["County"].apply(geo_key_clean)
+county_age["County_key"] = county_age["County"].apply(geo_key_clean)
+county_tests["County_key"] = county_tests["County"].apply(geo_key_clean)
+
+# Counties that would silently drop out of the maps
+report_unmatched("county_pass", county_pass["County_key"], geo_index)
+report_unmatched("county_age", county_age["County_key"], geo_index)
+report_unmatched("county_tests", county_tests["County_key"], geo_index)
+
+
+# ======================================================
+# 3. PREBUILD ALL FIGURES
+# ======================================================
+
+# ------------------------------------------------------
+# FIG 1: Scatter — Pass Rate vs Average Age (Population Normalized)
+# ------------------------------------------------------
+fig_scatter_age = px.scatter(
+    merged_age_pass,
+    x="Average_Age",
+    y="Pass Rate",
+    hover_data=["County", "Population"],
+    labels={
+        "Average_Age": "Average Age",
+        "Pass Rate": "Pass Rate (%)"
+    },
+    title="Pass Rate vs Average Age by County (Opacity = Population)",
+    trendline="ols"
+)
+
+# Update marker opacity based on population
+fig_scatter_age.update_traces(marker=dict(opacity=merged_age_pass['Opacity']))
+fig_scatter_age.update_layout(margin=dict(l=20, r=20, t=40, b=20))
+
+# ------------------------------------------------------
+# FIG 2: Pass Rate Choropleth Map
+# ------------------------------------------------------
+fig_pass_map = px.choropleth(
+    county_pass,
+    geojson=geojson,
+    locations="County_key",
+    featureidkey=f"properties.{GEO_KEY}",
+    color="Pass Rate",
+    color_continuous_scale="Viridis",
+    title="Driving Test Pass Rate by County"
+)
+fig_pass_map.update_geos(**map_geos)
+fig_pass_map.add_trace(map_labels)
+fig_pass_map.update_layout(margin=dict(l=0, r=0, t=50, b=0))
+
+# ------------------------------------------------------
+# FIG 3: Average Age Map
+# ------------------------------------------------------
+fig_age_map = px.choropleth(
+    county_age,
+    geojson=geojson,
+    locations="County_key",
+    featureidkey=f"properties.{GEO_KEY}",
+    color="VALUE",
+    color_continuous_scale="Viridis",
+    labels={"VALUE": "Average Age"},
+    title="Average Age by County"
+)
+fig_age_map.update_geos(**map_geos)
+fig_age_map.add_trace(map_labels)
+fig_age_map.update_layout(margin=dict(l=0, r=0, t=50, b=0))
+
+# ------------------------------------------------------
+# FIG 4: Tests per 1,000 Population Map
+# (from tests_map.py - population normalized)
+# ------------------------------------------------------
+fig_tests_map = px.choropleth(
+    county_tests,
+    geojson=geojson,
+    locations="County_key",
+    featureidkey=f"properties.{GEO_KEY}",
+    color="Tests_per_1000",
+    color_continuous_scale="Blues",
+    labels={"Tests_per_1000": "Tests per 1,000 Population"},
+    hover_data={"Number of Tests": True, "Population": ":,.0f"},
+    title="Driving Tests per 1,000 Population by County"
+)
+fig_tests_map.update_geos(**map_geos)
+fig_tests_map.add_trace(map_labels)
+fig_tests_map.update_layout(margin=dict(l=0, r=0, t=50, b=0))
+
+# ------------------------------------------------------
+# FIG 5: Pass Rate vs Tests per 1,000 Population (Population Normalized)
+# ------------------------------------------------------
+fig_pass_vs_tests = px.scatter(
+    county_pass_tests,
+    x="Tests_per_1000",
+    y="Pass Rate",
+    hover_data=["County", "Number of Tests", "Population"],
+    labels={
+        "Tests_per_1000": "Tests per 1,000 Population",
+        "Pass Rate": "Pass Rate (%)"
+    },
+    trendline="ols",
+    title="Pass Rate vs Tests per 1,000 Population by County"
+)
+
+# Update hover template for better information display
+fig_pass_vs_tests.update_traces(
+    hovertemplate='<b>%{customdata[0]}</b><br>' +
+                  'Tests per 1,000: %{x:.1f}<br>' +
+                  'Pass Rate: %{y:.1f}%<br>' +
+                  'Total Tests: %{customdata[1]:,}<br>' +
+                  'Population: %{customdata[2]:,.0f}<extra></extra>',
+    selector=dict(mode='markers')
+)
+fig_pass_vs_tests.update_layout(margin=dict(l=20, r=20, t=40, b=20))
+
+# ------------------------------------------------------
+# FIG 6: Monthly Pass Rates Over Time
+# (from visualize_pass_rates.py)
+# ------------------------------------------------------
+monthly_grouped = monthly_pass_rates(filter_tests(df_monthly, centre=NATIONAL_CENTRE))
+
+fig_monthly = go.Figure()
+
+years = sorted(monthly_grouped["Year"].unique())
+palette = px.colors.qualitative.Plotly
+
+for i, y in enumerate(years):
+    d = monthly_grouped[monthly_grouped["Year"] == y]
+    fig_monthly.add_trace(go.Scatter(
+        x=d["Month_Num"].astype(str),
+        y=d["Pass Rate"],
+        mode="lines+markers",
+        name=str(y),
+        line=dict(width=2, color=palette[i % len(palette)])
+    ))
+
+fig_monthly.update_layout(
+    title="Monthly Pass Rates by Year",
+    xaxis_title="Month",
+    yaxis_title="Pass Rate (%)",
+    margin=dict(l=20, r=20, t=40, b=20),
+    height=600
+)
+
+# ------------------------------------------------------
+# FIG 7: Centre Anomalies (pass rate and test volume)
+# (from anomalies.py - rolling and seasonal robust z-scores)
+# ------------------------------------------------------
+df_anomalies = loaded["df_anomalies"]
+
+fig_anomalies = px.scatter(
+    df_anomalies,
+    x="Month",
+    y="Seasonal_Z",
+    color="Metric",
+    symbol="Driving Test Categories",
+    hover_data=["Driving Test Centre", "Value", "Rolling_Z"],
+    labels={"Seasonal_Z": "Seasonal Residual Z-Score"},
+    title="Unexpected Monthly Jumps by Driving Test Centre"
+)
+fig_anomalies.add_hline(y=0, line_width=1, line_color="grey")
+fig_anomalies.update_layout(margin=dict(l=20, r=20, t=40, b=20), height=600)
+
+# ------------------------------------------------------
+# FIG 8: Monthly Test Volumes with 12-Month Forecast
+# (from forecasting.py - batched seasonal regression)
+# ------------------------------------------------------
+df_forecast = loaded["df_forecast"]
+
+national_history = df_monthly[df_monthly["Driving Test Centre"] == NATIONAL_CENTRE].copy()
+national_history["Month"] = parse_months(national_history["Month"])
+national_forecast = df_forecast[df_forecast["Driving Test Centre"] == NATIONAL_CENTRE]
+
+fig_forecast = go.Figure()
+
+for i, category in enumerate(sorted(national_history["Driving Test Categories"].unique())):
+    color = palette[i % len(palette)]
+    h = national_history[national_history["Driving Test Categories"] == category]
+    f = national_forecast[national_forecast["Driving Test Categories"] == category]
+
+    fig_forecast.add_trace(go.Scatter(
+        x=h["Month"], y=h["Number of Tests"],
+        mode="lines+markers", name=category,
+        line=dict(width=2, color=color), legendgroup=category
+    ))
+    fig_forecast.add_trace(go.Scatter(
+        x=pd.concat([f["Month"], f["Month"][::-1]]),
+        y=pd.concat([f["Upper"], f["Lower"][::-1]]),
+        fill="toself", fillcolor=color, opacity=0.2, line=dict(width=0),
+        hoverinfo="skip", showlegend=False, legendgroup=category
+    ))
+    fig_forecast.add_trace(go.Scatter(
+        x=f["Month"], y=f["Forecast"],
+        mode="lines", name=f"{category} (forecast)",
+        line=dict(width=2, dash="dash", color=color), legendgroup=category
+    ))
+
+fig_forecast.update_layout(
+    title="Monthly Number of Tests with 12-Month Forecast (95% band)",
+    xaxis_title="Month",
+    yaxis_title="Number of Tests",
+    margin=dict(l=20, r=20, t=40, b=20),
+    height=600
+)
+
+# ------------------------------------------------------
+# FIG 9: Correlation Matrix of County Metrics
+# (from correlations.py - permutation-test p-values)
+# ------------------------------------------------------
+county_metrics = loaded["county_metrics"]
+correlations = loaded["correlations"]
+
+fig_correlations = go.Figure()
+
+for method, name in (("pearson", "Pearson r"), ("spearman", "Spearman ρ")):
+    r = correlations[method]
+    p = correlations[f"{method}_p"]
+    fig_correlations.add_trace(go.Heatmap(
+        z=r.values, x=list(r.columns), y=list(r.index),
+        customdata=p.values,
+        text=[[f"{v:.2f}" for v in row] for row in r.values],
+        texttemplate="%{text}",
+        zmin=-1, zmax=1, colorscale="RdBu", reversescale=True,
+        colorbar=dict(title=name),
+        hovertemplate="%{y} vs %{x}<br>" + name + " = %{z:.2f}<br>p = %{customdata:.4f}<extra></extra>",
+        name=name, visible=method == "pearson"
+    ))
+
+fig_correlations.update_layout(
+    title="Correlation of County Metrics (click a cell to compare the pair)",
+    updatemenus=[dict(
+        type="buttons", direction="right", x=1, y=1.12, xanchor="right",
+        buttons=[
+            dict(label="Pearson", method="update", args=[{"visible": [True, False]}]),
+            dict(label="Spearman", method="update", args=[{"visible": [False, True]}]),
+        ],
+    )],
+    yaxis=dict(autorange="reversed"),
+    margin=dict(l=20, r=20, t=60, b=20),
+    height=650
+)
+_mark("figures")
+
+
+# Drill-down for one pair of metrics, drawn on demand by dash_app.py
+def correlation_pair(x: str, y: str):
+    pair = county_metrics[[x, y]].dropna().reset_index()
+    fig = px.scatter(
+        pair, x=x, y=y, hover_data=["County"], text="County", trendline="ols",
+        title=(f"{y} vs {x}: Pearson r = {correlations['pearson'].loc[y, x]:.2f} "
+               f"(p = {correlations['pearson_p'].loc[y, x]:.4f}), "
+               f"Spearman ρ = {correlations['spearman'].loc[y, x]:.2f} "
+               f"(p = {correlations['spearman_p'].loc[y, x]:.4f}), n = {len(pair)}")
+    )
+    fig.update_traces(textposition="top center", selector=dict(mode="markers+text"))
+    fig.update_layout(margin=dict(l=20, r=20, t=40, b=20))
+    return fig
+
+
+# ======================================================
+# 4. SHARED WITH THE APP (tabs, API and export)
+# ======================================================
+
+FIGURES = {
+    "tab_scatter_age": fig_scatter_age,
+    "tab_pass_map": fig_pass_map,
+    "tab_age_map": fig_age_map,
+    "tab_tests_map": fig_tests_map,
+    "tab_pass_tests": fig_pass_vs_tests,
+    "tab_monthly": fig_monthly,
+    "tab_anomalies": fig_anomalies,
+    "tab_forecast": fig_forecast,
+    "tab_correlations": fig_correlations,
+}
+
+sources = {
+    "df_driving": df_driving,
+    "df_monthly": df_monthly,
+    "df_age": df_age,
+    "population_lookup": population_lookup,
+}
+
+export_years = sorted(int(y) for y in df_driving["Month"].str[:4].unique())
+export_categories = sorted(df_driving["Driving Test Categories"].dropna().unique())
+export_counties = sorted(df_driving["County"].dropna().unique())
@@ -0,0 +1,131 @@
+"""
+export.py
+
+Streaming bulk export of the driving test rows and aggregates:
+
+    /export/<dataset>.<csv|parquet|arrow>?year_from=&year_to=&category=&county=&centre=
+
+<dataset> is "rows" for the filtered ROA30 rows, or any aggregate name from
+query_api.py. Rows are filtered and encoded CHUNK_ROWS at a time and each
+chunk is sent as soon as it is encoded, so the full file is never held in
+memory. Parquet and Arrow IPC need pyarrow, which is imported on first use.
+"""
+
+from flask import Response, abort, jsonify, request, stream_with_context
+
+from query_api import AGGREGATES, build_aggregate, normalize_params
+
+CHUNK_ROWS = 50_000
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+DATASETS = ["rows"] + AGGREGATES
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def iter_chunks(df, params: dict, chunk_rows: int = CHUNK_ROWS):
+    """Filter `df` a slice at a time instead of materializing the filtered frame."""
+    from aggregates import filter_tests
+
+    empty = True
+    for start in range(0, len(df), chunk_rows):
+        chunk = filter_tests(df.iloc[start:start + chunk_rows], **params)
+        if len(chunk):
+            empty = False
+            yield chunk
+    if empty:
+        # No rows still exports the columns (CSV header, Parquet/Arrow schema)
+        yield df.iloc[:0]
+
+
+def iter_csv(chunks):
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+def iter_arrow(chunks, fmt: str):
+    import pyarrow as pa
+
+    sink = _ChunkSink()
+    writer = None
+    for chunk in chunks:
+        if writer is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            if fmt == "parquet":
+                import pyarrow.parquet as pq
+                writer = pq.ParquetWriter(sink, schema)
+            else:
+                writer = pa.ipc.new_stream(sink, schema)
+        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        writer.write_table(table)
+        yield sink.drain()
+
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def stream_export(dataset: str, fmt: str, sources: dict, params: dict):
+    """Generator of encoded bytes for one export."""
+    if dataset == "rows":
+        chunks = iter_chunks(sources["df_driving"], params)
+    else:
+        aggregate = build_aggregate(dataset, sources, params)
+        # range(1) for an empty aggregate, so its columns are still written
+        chunks = (aggregate.iloc[i:i + CHUNK_ROWS] for i in range(0, max(len(aggregate), 1), CHUNK_ROWS))
+
+    if fmt == "csv":
+        return iter_csv(chunks)
+    return iter_arrow(chunks, fmt)
+
+
+def register_export(server, get_sources):
+    """Add the /export endpoint to a Flask server (same `get_sources` as the query API)."""
+
+    @server.route("/export/<dataset>.<fmt>")
+    def export_endpoint(dataset, fmt):
+        if dataset not in DATASETS or fmt not in FORMATS:
+            abort(404)
+        try:
+            params = dict(normalize_params(request.args))
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+
+        if fmt != "csv":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return jsonify(error=f"{fmt} export needs pyarrow (pip install pyarrow)"), 501
+
+        body = stream_export(dataset, fmt, get_sources(), params)
+        return Response(
+            stream_with_context(body),
+            mimetype=FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="{dataset}.{fmt}"'},
+        )
@@ -0,0 +1,177 @@
+"""
+forecasting.py
+
+Forecasts the monthly number of tests for every driving test centre and
+test category in the ROA30 data.
+
+Every centre x category series is fitted with the same seasonal regression
+    y = level + trend * t + calendar-month effect
+as one batched least-squares problem: the design matrix is shared and each
+series only differs in which months are observed, so the normal equations
+for all series are built with one matrix product and solved with one batched
+solve.
+Large fleets are split into chunks and fitted on a process pool.
+
+Usage: python forecasting.py [n_synthetic_series]
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from anomalies import CATEGORY_COL, CENTRE_COL, MONTH_COL, parse_months
+
+VALUE_COL = "Number of Tests"
+HORIZON = 12
+
+# 95% prediction band, assuming normally distributed residuals
+BAND_Z = 1.96
+# Keeps the normal equations solvable for series that never saw a given month
+RIDGE = 1e-6
+# Below this many series a process pool costs more than it saves
+POOL_MIN_SERIES = 20000
+
+
+def series_matrix(df: pd.DataFrame, value_col: str = VALUE_COL) -> pd.DataFrame:
+    """Pivot ROA30 into a (centre, category) x month matrix; months without data stay NaN."""
+    # min_count=1 so a gap is NaN (masked out of the fit) rather than a month with 0 tests
+    matrix = (
+        df.groupby([CENTRE_COL, CATEGORY_COL, parse_months(df[MONTH_COL])], observed=True)[value_col]
+        .sum(min_count=1)
+        .unstack()
+    )
+    return matrix.sort_index(axis=1)
+
+
+def design_matrix(months: pd.DatetimeIndex, start: pd.Timestamp) -> np.ndarray:
+    """Intercept, linear trend (in years) and 11 calendar-month dummies."""
+    t = ((months.year - start.year) * 12 + (months.month - start.month)).to_numpy() / 12
+    dummies = months.month.to_numpy()[:, None] == np.arange(2, 13)[None, :]
+    return np.column_stack([np.ones(len(months)), t, dummies.astype(float)])
+
+
+def fit_forecast(values: np.ndarray, X: np.ndarray, X_future: np.ndarray) -> tuple:
+    """Fit every row of `values` against X and forecast X_future.
+
+    Returns (forecast, sigma) where forecast is (series, horizon) and sigma is
+    the residual standard deviation of each series. Series with too few
+    observations to fit get NaN.
+    """
+    observed = ~np.isnan(values)
+    y = np.where(observed, values, 0.0)
+    w = observed.astype(float)
+    n_params = X.shape[1]
+
+    # Row i of w @ outer is X' W_i X flattened, so one matrix product builds
+    # the normal equations of every series
+    outer = (X[:, :, None] * X[:, None, :]).reshape(len(X), -1)
+    XtWX = (w @ outer).reshape(-1, n_params, n_params) + RIDGE * np.eye(n_params)
+    XtWy = (w * y) @ X
+    beta = np.linalg.solve(XtWX, XtWy[..., None])[..., 0]
+
+    residual = (y - beta @ X.T) * w
+    n_obs = w.sum(axis=1)
+    dof = n_obs - n_params
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = np.sqrt((residual ** 2).sum(axis=1) / dof)
+
+    forecast = beta @ X_future.T
+    too_short = dof < 2
+    forecast[too_short] = np.nan
+    sigma[too_short] = np.nan
+    return forecast, sigma
+
+
+def _fit_chunk(args: tuple) -> tuple:
+    return fit_forecast(*args)
+
+
+def forecast_matrix(matrix: pd.DataFrame, horizon: int = HORIZON, workers: int = None) -> pd.DataFrame:
+    """Forecast every row of a series x month matrix `horizon` months ahead.
+
+    Returns a long frame with Forecast, Lower and Upper per series and month.
+    """
+    months = pd.DatetimeIndex(matrix.columns)
+    future = pd.date_range(months[-1] + pd.offsets.MonthBegin(), periods=horizon, freq="MS")
+    X = design_matrix(months, months[0])
+    X_future = design_matrix(future, months[0])
+    values = matrix.to_numpy(dtype=float)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(values) >= POOL_MIN_SERIES:
+        chunks = np.array_split(values, workers)
+        # load_all() calls this from a worker thread, and forking a threaded
+        # process can deadlock the child; spawned workers start clean
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            parts = list(pool.map(_fit_chunk, [(c, X, X_future) for c in chunks]))
+        forecast = np.concatenate([p[0] for p in parts])
+        sigma = np.concatenate([p[1] for p in parts])
+    else:
+        forecast, sigma = fit_forecast(values, X, X_future)
+
+    # Test counts can't go negative
+    band = BAND_Z * sigma[:, None]
+    lower = np.clip(forecast - band, 0, None)
+    upper = np.clip(forecast + band, 0, None)
+    forecast = np.clip(forecast, 0, None)
+
+    index = pd.MultiIndex.from_product([matrix.index, future], names=["Series", MONTH_COL])
+    result = pd.DataFrame({
+        "Forecast": forecast.ravel(),
+        "Lower": lower.ravel(),
+        "Upper": upper.ravel(),
+    }, index=index).reset_index()
+
+    if isinstance(matrix.index, pd.MultiIndex):
+        keys = pd.DataFrame(result.pop("Series").tolist(), columns=matrix.index.names)
+        result = pd.concat([keys, result], axis=1)
+    return result
+
+
+def forecast_tests(df: pd.DataFrame, horizon: int = HORIZON, workers: int = None) -> pd.DataFrame:
+    """Forecast the number of tests for every centre and category."""
+    return forecast_matrix(series_matrix(df), horizon, workers)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rng = np.random.default_rng(0)
+    months = pd.date_range("2021-01-01", periods=58, freq="MS")
+    season = 1 + 0.2 * np.sin(2 * np.pi * (months.month.to_numpy() - 1) / 12)
+    synthetic = rng.uniform(20, 1500, size=(n, 1)) * season * rng.normal(1, 0.1, size=(n, 58))
+    synthetic[rng.random(synthetic.shape) < 0.02] = np.nan
+    synthetic = pd.DataFrame(synthetic, columns=months)
+
+    for w in (1, None):
+        start = time.perf_counter()
+        forecast_matrix(synthetic, workers=w)
+        label = "single process" if w == 1 else f"{os.cpu_count()} processes"
+        print(f"Forecast {n} synthetic series ({label}) in {time.perf_counter() - start:.3f}s")
+
+    roa30 = Path(__file__).resolve().parent.parent / "ROA30.20251112T121150_cleaned.csv"
+    df = pd.read_csv(roa30)
+
+    # A series with gaps must get the same forecast as one fitted on its observed months only
+    matrix = series_matrix(df)
+    months = pd.DatetimeIndex(matrix.columns)
+    future = pd.date_range(months[-1] + pd.offsets.MonthBegin(), periods=HORIZON, freq="MS")
+    X, X_future = design_matrix(months, months[0]), design_matrix(future, months[0])
+    values = matrix.to_numpy(dtype=float)
+    gappy = np.flatnonzero(np.isnan(values).any(axis=1) & (np.isfinite(values).sum(axis=1) > X.shape[1] + 2))
+    batched, _ = fit_forecast(values[gappy], X, X_future)
+    for row, i in enumerate(gappy):
+        seen = np.isfinite(values[i])
+        alone, _ = fit_forecast(values[i][seen][None, :], X[seen], X_future)
+        assert np.allclose(batched[row], alone[0], rtol=1e-6, atol=1e-6), matrix.index[i]
+    print(f"{len(gappy)} series with gaps match a fit on their observed months only")
+
+    forecast = forecast_tests(df)
+    print(forecast[forecast[CENTRE_COL] == "All driving test centres"].to_string(index=False))
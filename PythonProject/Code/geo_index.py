@@ -0,0 +1,151 @@
+"""
+geo_index.py
+
+One-time index of the county features in ie.json: bounding box, centroid
+and name of each feature, stored next to the GeoJSON as ie.index.json.
+
+With the index the choropleths get explicit projection bounds instead of
+`fitbounds="geojson"` (which makes the browser scan every coordinate on
+each render), county labels and zoom-to-fit come straight from the
+lookup, and the County_key join can be checked against the feature names
+when the data is loaded.
+
+The index is rebuilt automatically whenever ie.json changes.
+
+Usage: python geo_index.py
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+GEO_KEY = "name"  # simplemaps property key
+INDEX_SUFFIX = ".index.json"
+
+# Padding around the bounds, as a fraction of their width/height
+PAD = 0.04
+
+
+def _polygons(geometry: dict) -> list:
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    return geometry["coordinates"]
+
+
+def feature_bounds_and_centroid(geometry: dict) -> tuple:
+    """Bounding box and area-weighted centroid of a (Multi)Polygon."""
+    rings = [np.asarray(polygon[0], dtype=float) for polygon in _polygons(geometry)]
+    points = np.concatenate(rings)
+    bbox = [*points.min(axis=0), *points.max(axis=0)]
+
+    # Shoelace formula on each outer ring; holes are small enough to ignore
+    areas, centroids = [], []
+    for ring in rings:
+        x, y = ring[:, 0], ring[:, 1]
+        x1, y1 = np.roll(x, -1), np.roll(y, -1)
+        cross = x * y1 - x1 * y
+        area = cross.sum() / 2
+        if area == 0:
+            continue
+        areas.append(abs(area))
+        centroids.append([((x + x1) * cross).sum() / (6 * area), ((y + y1) * cross).sum() / (6 * area)])
+
+    if areas:
+        centroid = np.average(centroids, axis=0, weights=areas)
+    else:
+        centroid = points.mean(axis=0)
+    return [round(float(v), 5) for v in bbox], [round(float(v), 5) for v in centroid]
+
+
+def build_index(geojson: dict, key: str = GEO_KEY) -> dict:
+    """{feature name: {"bbox": [lon0, lat0, lon1, lat1], "centroid": [lon, lat]}}"""
+    index = {}
+    for feature in geojson["features"]:
+        bbox, centroid = feature_bounds_and_centroid(feature["geometry"])
+        index[feature["properties"][key]] = {"bbox": bbox, "centroid": centroid}
+    return index
+
+
+def load_index(geo_path: Path, geojson: dict = None, source: bytes = None) -> dict:
+    """Read the stored index for `geo_path`, (re)building it if missing or stale.
+
+    Pass the already read file contents (`source`) and parsed `geojson` to
+    avoid reading ie.json again.
+    """
+    geo_path = Path(geo_path)
+    index_path = geo_path.with_name(geo_path.stem + INDEX_SUFFIX)
+    if source is None:
+        source = geo_path.read_bytes()
+    source_hash = hashlib.sha1(source).hexdigest()
+
+    if index_path.exists():
+        stored = json.loads(index_path.read_text())
+        if stored.get("source_sha1") == source_hash:
+            return stored["features"]
+
+    if geojson is None:
+        geojson = json.loads(source)
+    features = build_index(geojson)
+
+    # Several workers may rebuild at once; write a private file and swap it in
+    # atomically so nobody reads a half-written index
+    with tempfile.NamedTemporaryFile("w", dir=index_path.parent, prefix=index_path.name,
+                                     suffix=".tmp", delete=False) as f:
+        json.dump({"source_sha1": source_hash, "features": features}, f, indent=1)
+    # NamedTemporaryFile is private (0600); the index must stay readable by
+    # whichever account runs the dashboard
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, index_path)
+    return features
+
+
+def unmatched_keys(keys, index: dict) -> list:
+    """Join keys that have no feature of the same name (they would not be drawn)."""
+    return sorted(set(keys) - set(index))
+
+
+def report_unmatched(label: str, keys, index: dict) -> list:
+    missing = unmatched_keys(keys, index)
+    if missing:
+        print(f"GeoJSON join: {label} has no county feature for {', '.join(map(str, missing))}")
+    return missing
+
+
+def geo_ranges(index: dict, names=None, pad: float = PAD) -> dict:
+    """update_geos() arguments that frame the given features (all by default)."""
+    boxes = np.array([index[n]["bbox"] for n in (names if names is not None else index)])
+    lon0, lat0 = boxes[:, :2].min(axis=0).tolist()
+    lon1, lat1 = boxes[:, 2:].max(axis=0).tolist()
+    pad_lon, pad_lat = (lon1 - lon0) * pad, (lat1 - lat0) * pad
+    return {
+        "projection_type": "mercator",
+        "lonaxis_range": [lon0 - pad_lon, lon1 + pad_lon],
+        "lataxis_range": [lat0 - pad_lat, lat1 + pad_lat],
+        "center": {"lon": (lon0 + lon1) / 2, "lat": (lat0 + lat1) / 2},
+    }
+
+
+def centroid_labels(index: dict, names=None) -> dict:
+    """Scattergeo arguments for a text label on each feature's centroid."""
+    names = sorted(names if names is not None else index)
+    return {
+        "lon": [index[n]["centroid"][0] for n in names],
+        "lat": [index[n]["centroid"][1] for n in names],
+        "text": names,
+        "mode": "text",
+        "textfont": {"size": 10, "color": "black"},
+        "hoverinfo": "skip",
+        "showlegend": False,
+    }
+
+
+if __name__ == "__main__":
+    geo_path = Path(__file__).resolve().parent.parent / "ie.json"
+    index = load_index(geo_path)
+    print(f"Indexed {len(index)} features from {geo_path.name}")
+    for name, entry in sorted(index.items()):
+        print(f"  {name:<12} bbox={entry['bbox']} centroid={entry['centroid']}")
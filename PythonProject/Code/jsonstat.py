@@ -0,0 +1,127 @@
+"""
+jsonstat.py
+
+Reader for CSO PxStat tables in JSON-stat 2.0 format (the "JSON-stat 2.0"
+download on data.cso.ie, or the PxStat API).
+
+A JSON-stat dataset is a dense cube: a list of dimensions, each with an
+ordered category index, and one flat value vector in row-major order. The
+DataFrame is built straight from that structure - the category codes of
+every row come from np.repeat/np.tile over the dimension sizes, and every
+dimension becomes a categorical - so no label is ever repeated as text or
+parsed per row, unlike the CSV exports. The categories are sorted by label,
+so grouping on them gives the same order as on the CSV's text columns.
+
+By default the columns follow the PxStat CSV layout ("Statistic Label",
+one column per dimension label, "UNIT", "VALUE"). Passing `spread` turns one
+dimension (usually the statistic) into one value column per category, the
+way the ROA30 CSV has separate Pass Rate and Number of Tests columns.
+
+Usage: python jsonstat.py table.json
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def _categories(dimension: dict) -> tuple:
+    """Category codes in cube order and their labels."""
+    category = dimension["category"]
+    index = category.get("index")
+    if index is None:
+        codes = list(category["label"])
+    elif isinstance(index, dict):
+        codes = sorted(index, key=index.get)
+    else:
+        codes = list(index)
+    labels = category.get("label", {})
+    return codes, [labels.get(c, c) for c in codes]
+
+
+def _values(values, n: int) -> np.ndarray:
+    if isinstance(values, dict):
+        # Sparse form: {"flat position": value}
+        out = np.full(n, np.nan)
+        positions = np.fromiter(values.keys(), dtype=np.int64, count=len(values))
+        out[positions] = np.array(list(values.values()), dtype=float)
+        return out
+    return np.array(values, dtype=float)
+
+
+def _metric_id(dataset: dict):
+    metric = dataset.get("role", {}).get("metric", [])
+    return metric[0] if metric else None
+
+
+def read_jsonstat(source, spread: str = None, rename: dict = None) -> pd.DataFrame:
+    """Build a DataFrame from a JSON-stat 2.0 dataset (path, file-like or dict).
+
+    spread: id or label of a dimension to turn into one value column per category
+    rename: mapping applied to the resulting column names
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "r", encoding="utf-8") as f:
+            dataset = json.load(f)
+    elif isinstance(source, dict):
+        dataset = source
+    else:
+        dataset = json.load(source)
+
+    # Copies, so spreading doesn't modify the caller's dataset
+    ids = list(dataset["id"])
+    sizes = list(dataset["size"])
+    dimensions = [dataset["dimension"][i] for i in ids]
+    values = _values(dataset["value"], int(np.prod(sizes)))
+    metric = _metric_id(dataset)
+
+    if spread is not None:
+        axis = next((k for k, i in enumerate(ids) if spread in (i, dimensions[k].get("label"))), None)
+        if axis is None:
+            raise KeyError(f"No dimension {spread!r} to spread; dimensions are {', '.join(ids)}")
+        _, value_columns = _categories(dimensions[axis])
+        cube = np.moveaxis(values.reshape(sizes), axis, -1)
+        values = cube.reshape(-1, sizes[axis])
+        del ids[axis], sizes[axis], dimensions[axis]
+
+    n_rows = int(np.prod(sizes))
+    columns, unit = {}, None
+    for k, (dim_id, dimension) in enumerate(zip(ids, dimensions)):
+        codes, labels = _categories(dimension)
+        inner = int(np.prod(sizes[k + 1:]))
+        outer = int(np.prod(sizes[:k]))
+        row_codes = np.tile(np.repeat(np.arange(sizes[k], dtype=np.int32), inner), outer)
+        name = "Statistic Label" if dim_id == metric else dimension.get("label", dim_id)
+        categories = pd.Index(labels).unique().sort_values()
+        columns[name] = pd.Categorical.from_codes(categories.get_indexer(labels)[row_codes], categories=categories)
+
+        if dim_id == metric:
+            units = dimension["category"].get("unit", {})
+            unit_labels = [units.get(c, {}).get("label", "") for c in codes]
+            unit_cats = pd.Index(unit_labels).unique()
+            unit = pd.Categorical.from_codes(unit_cats.get_indexer(unit_labels)[row_codes], categories=unit_cats)
+
+    if spread is None:
+        if unit is not None:
+            columns["UNIT"] = unit
+        columns["VALUE"] = values
+    else:
+        for j, label in enumerate(value_columns):
+            columns[label] = values[:, j]
+
+    df = pd.DataFrame(columns, index=pd.RangeIndex(n_rows))
+    return df.rename(columns=rename) if rename else df
+
+
+if __name__ == "__main__":
+    path = Path(sys.argv[1])
+    start = time.perf_counter()
+    df = read_jsonstat(path)
+    elapsed = time.perf_counter() - start
+    print(f"Read {len(df):,} rows from {path.name} in {elapsed:.3f}s, "
+          f"{df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+    print(df.head())
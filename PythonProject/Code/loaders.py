@@ -0,0 +1,174 @@
+"""
+loaders.py
+
+Loads every dashboard input concurrently and builds each aggregate as soon
+as the sources it depends on are ready.
+
+The work is described as a small task graph (name -> dependencies, function).
+Independent reads (the four CSVs and the GeoJSON) start together
+on a thread pool - CSV parsing and JSON decoding spend much of their time
+in C code and I/O, so they overlap well - and every later task is submitted
+the moment its last dependency finishes instead of waiting for all reads.
+
+A statistical source is read from its PxStat JSON-stat export when that file
+is present next to the CSV (see jsonstat.py), and from the CSV otherwise.
+ROA30.json holds both the driving test and the monthly data, so it is read
+once and used for both.
+
+Every source is validated right after it is parsed (see validation.py); a
+ValidationError stops the load before any aggregate is built from it.
+"""
+
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+from aggregates import (
+    add_county, county_pass_rate, county_average_age, population_by_county,
+    county_test_counts, age_vs_pass_rate, pass_rate_vs_tests,
+)
+from anomalies import detect_anomalies
+from clean_average_age import aggregate_and_replace
+from correlations import correlation_matrices, county_metrics
+from forecasting import forecast_tests
+from geo_index import load_index
+from jsonstat import read_jsonstat
+from validation import validate
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Main datasets
+driving_path = BASE_DIR / "driving_test_data.csv"
+age_path = BASE_DIR / "Average_Age_Per_County.cleaned.csv"
+geo_path = BASE_DIR / "ie.json"
+driving_monthly_path = BASE_DIR / "ROA30.20251112T121150_cleaned.csv"
+population_path = BASE_DIR / "PEA08.20251203T161259.csv"
+
+# JSON-stat 2.0 downloads of the same PxStat tables, preferred when present
+roa30_jsonstat_path = BASE_DIR / "ROA30.json"
+age_jsonstat_path = BASE_DIR / "Average_Age_Per_County.json"
+population_jsonstat_path = BASE_DIR / "PEA08.json"
+
+# ROA30 statistic labels -> the value columns of the CSV exports
+ROA30_STATISTICS = {
+    "Driving Test Pass Rate": "Pass Rate",
+    "Driving Tests Delivered": "Number of Tests",
+}
+
+
+def read_roa30(path):
+    return read_jsonstat(path, spread="Statistic", rename=ROA30_STATISTICS)
+
+
+def read_age(path):
+    # The JSON-stat table is the raw export; merge city/county rows like clean_average_age.py
+    return aggregate_and_replace(read_jsonstat(path))
+
+
+# source: (JSON-stat path, reader); the ROA30 sources are read by read_roa30_source()
+JSONSTAT_SOURCES = {
+    "df_age": (age_jsonstat_path, read_age),
+    "df_population": (population_jsonstat_path, read_jsonstat),
+}
+
+
+def read_source(source, csv_path):
+    json_path, reader = JSONSTAT_SOURCES.get(source, (None, None))
+    if json_path is not None and json_path.exists():
+        return validate(source, reader(json_path))
+    # utf-8-sig drops the BOM some CSO exports start with
+    return validate(source, pd.read_csv(csv_path, encoding="utf-8-sig"))
+
+
+def read_roa30_source():
+    """ROA30.json with counties added, or None when only the CSV exports are present."""
+    if not roa30_jsonstat_path.exists():
+        return None
+    return add_county(validate("df_driving", read_roa30(roa30_jsonstat_path)))
+
+
+def roa30_frame(source, csv_path, roa30):
+    # The JSON-stat table serves as both ROA30 sources; otherwise each has its own CSV
+    return roa30 if roa30 is not None else add_county(read_source(source, csv_path))
+
+
+# Task results used only to build other results; load_all() drops them
+INTERMEDIATE = {"geo_source", "roa30_source"}
+
+
+# name: (dependencies, function called with the dependencies' results)
+TASKS = {
+    # Sources, each checked against its schema in validation.py
+    "roa30_source": ((), read_roa30_source),
+    "df_driving": (("roa30_source",), lambda roa30: roa30_frame("df_driving", driving_path, roa30)),
+    "df_age": ((), lambda: read_source("df_age", age_path)),
+    "df_population": ((), lambda: read_source("df_population", population_path)),
+    "df_monthly": (("roa30_source",), lambda roa30: roa30_frame("df_monthly", driving_monthly_path, roa30)),
+    # ie.json is read once; the index is checked against the same bytes
+    "geo_source": ((), geo_path.read_bytes),
+    "geojson": (("geo_source",), json.loads),
+    "geo_index": (("geojson", "geo_source"), lambda geojson, source: load_index(geo_path, geojson, source)),
+
+    # Aggregates
+    "county_pass": (("df_driving",), county_pass_rate),
+    "county_age": (("df_age",), county_average_age),
+    "population_lookup": (("df_population",), population_by_county),
+    "county_tests": (("df_driving", "population_lookup"), county_test_counts),
+    "merged_age_pass": (("county_pass", "county_age", "population_lookup"), age_vs_pass_rate),
+    "county_pass_tests": (("county_pass", "county_tests", "population_lookup"), pass_rate_vs_tests),
+    "df_anomalies": (("df_monthly",), detect_anomalies),
+    "df_forecast": (("df_monthly",), forecast_tests),
+    "county_metrics": (("df_driving", "county_pass", "county_age", "county_tests"), county_metrics),
+    "correlations": (("county_metrics",), correlation_matrices),
+}
+
+
+def run_tasks(tasks: dict, max_workers: int = None) -> tuple:
+    """Run a task graph on a thread pool, starting each task once its inputs exist.
+
+    Returns (results, timings) where timings holds each task's own run time.
+    """
+    results, timings, futures = {}, {}, {}
+    pending = dict(tasks)
+
+    def timed(name, func, *args):
+        start = time.perf_counter()
+        value = func(*args)
+        timings[name] = time.perf_counter() - start
+        return value
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        def submit_ready():
+            for name, (deps, func) in list(pending.items()):
+                if all(d in results for d in deps):
+                    del pending[name]
+                    futures[pool.submit(timed, name, func, *(results[d] for d in deps))] = name
+
+        submit_ready()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures.pop(future)] = future.result()
+            submit_ready()
+
+    if pending:
+        raise ValueError(f"Tasks with unknown dependencies: {', '.join(sorted(pending))}")
+    return results, timings
+
+
+def load_all(max_workers: int = None) -> tuple:
+    """Load every source and aggregate the dashboard needs; see TASKS."""
+    results, timings = run_tasks(TASKS, max_workers)
+    return {k: v for k, v in results.items() if k not in INTERMEDIATE}, timings
+
+
+if __name__ == "__main__":
+    for workers in (1, None):
+        start = time.perf_counter()
+        _, timings = load_all(workers)
+        elapsed = time.perf_counter() - start
+        label = "sequential" if workers == 1 else "concurrent"
+        print(f"{label}: {elapsed:.3f}s wall, {sum(timings.values()):.3f}s of task time")
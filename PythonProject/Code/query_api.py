@@ -0,0 +1,112 @@
+"""
+query_api.py
+
+JSON and CSV endpoints for the county and centre aggregates, served from
+the Dash app's Flask server:
+
+    /api/<aggregate>.<json|csv>?year_from=&year_to=&category=&county=&centre=
+
+<aggregate> is one of county_pass, county_tests, merged_age_pass and
+monthly_grouped. Rendered responses are kept in an in-process LRU keyed by
+the normalized query, so a repeated query is answered from memory without
+touching pandas, and every response carries an ETag for conditional GETs.
+
+aggregates (and so pandas) is only imported when a query is first built,
+which keeps registering the routes cheap for the dashboard's fast-start mode.
+"""
+
+import hashlib
+from functools import lru_cache
+
+from flask import Response, abort, jsonify, request
+
+AGGREGATES = ["county_pass", "county_tests", "merged_age_pass", "monthly_grouped"]
+CACHE_SIZE = 256
+FORMATS = {"json": "application/json", "csv": "text/csv"}
+PARAMS = ["year_from", "year_to", "category", "county", "centre"]
+
+
+def normalize_params(args) -> tuple:
+    """Turn request args into a hashable, order-independent cache key."""
+    unknown = set(args) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown query parameter(s): {', '.join(sorted(unknown))}")
+
+    params = {}
+    for name in PARAMS:
+        value = args.get(name, "").strip()
+        if not value:
+            continue
+        if name.startswith("year_"):
+            if not value.isdigit():
+                raise ValueError(f"{name} must be a year, got {value!r}")
+            params[name] = int(value)
+        elif name == "county":
+            params[name] = value.title()
+        else:
+            params[name] = value
+    return tuple(sorted(params.items()))
+
+
+def build_aggregate(name: str, sources: dict, params: dict):
+    """Recompute one aggregate from the source frames under the given filters."""
+    from aggregates import (
+        NATIONAL_CENTRE, filter_tests, county_pass_rate, county_average_age,
+        county_test_counts, age_vs_pass_rate, monthly_pass_rates,
+    )
+
+    df_driving = filter_tests(sources["df_driving"], **params)
+    population_lookup = sources["population_lookup"]
+
+    if name == "county_pass":
+        return county_pass_rate(df_driving)
+    if name == "county_tests":
+        return county_test_counts(df_driving, population_lookup)
+    if name == "merged_age_pass":
+        county_age = county_average_age(sources["df_age"])
+        if "county" in params:
+            county_age = county_age[county_age["County"] == params["county"]]
+        return age_vs_pass_rate(county_pass_rate(df_driving), county_age, population_lookup)
+    if name == "monthly_grouped":
+        # The national line unless a county or centre narrows it down
+        if "county" not in params and "centre" not in params:
+            params = dict(params, centre=NATIONAL_CENTRE)
+        df_monthly = filter_tests(sources["df_monthly"], **params)
+        if "centre" not in params:
+            df_monthly = df_monthly[df_monthly["Driving Test Centre"] != NATIONAL_CENTRE]
+        return monthly_pass_rates(df_monthly)
+    raise KeyError(name)
+
+
+def register_query_api(server, get_sources, cache_size: int = CACHE_SIZE):
+    """Add the aggregate endpoints to a Flask server.
+
+    `get_sources()` returns the loaded frames: df_driving and df_monthly
+    (with a County column), df_age and population_lookup.
+    """
+
+    @lru_cache(maxsize=cache_size)
+    def render(name: str, fmt: str, key: tuple) -> tuple:
+        df = build_aggregate(name, get_sources(), dict(key))
+        if fmt == "json":
+            body = df.to_json(orient="records").encode("utf-8")
+        else:
+            body = df.to_csv(index=False).encode("utf-8")
+        return body, hashlib.sha1(body).hexdigest()
+
+    @server.route("/api/<name>.<fmt>")
+    def aggregate_endpoint(name, fmt):
+        if name not in AGGREGATES or fmt not in FORMATS:
+            abort(404)
+        try:
+            key = normalize_params(request.args)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+
+        body, etag = render(name, fmt, key)
+        response = Response(body, mimetype=FORMATS[fmt])
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+
+    return render
@@ -0,0 +1,190 @@
+"""
+shared_store.py
+
+Shares the loaded dashboard data between server processes on one host.
+
+One loader process runs load_all() once and copies every DataFrame column
+into its own multiprocessing.shared_memory block: numeric and datetime
+columns as they are, text columns as categorical codes (the categories go
+into the manifest). A JSON manifest describes every block, and values that
+are not DataFrames (population lookup, GeoJSON and its index) are stored
+in the manifest itself.
+
+Workers started with DASH_SHARED_STORE=<manifest> attach to the blocks
+instead of loading anything (see dashboard_data.py). Every column is a
+read-only NumPy view of the shared buffer wrapped in a DataFrame without
+copying, so adding workers does not add copies of the frames.
+
+Only the frames are shared. Each worker still parses its own copy of the
+manifest values (the GeoJSON is the largest, about 1.5 MB once parsed),
+builds its own figures and imports pandas/plotly, which is most of a
+worker's memory (roughly 200 MB of a 255 MB worker). With the current data
+the frames are under 1 MB, so the saving per worker is small; it grows with
+the size of the ROA30 data, and attaching also skips the CSV parsing and
+aggregation at startup.
+
+The loader owns the blocks and removes them when it exits, so keep it
+running for as long as the workers are.
+
+On Windows a block is freed once no process has it open, so there too the
+loader has to outlive the workers.
+
+Usage: python shared_store.py [manifest.json]
+       DASH_SHARED_STORE=manifest.json python dash_app.py
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MANIFEST = Path(__file__).resolve().parent.parent / ".cache" / "shared_store.json"
+
+# Blocks attached by this process; the views into them must outlive every frame
+_attached = []
+
+
+# ======================================================
+# PUBLISH (loader process)
+# ======================================================
+
+def _share_array(values: np.ndarray, blocks: list) -> dict:
+    values = np.ascontiguousarray(values)
+    # A block can't be empty, but a column can
+    block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+    blocks.append(block)
+    return {"shm": block.name, "dtype": values.dtype.str, "shape": list(values.shape)}
+
+
+def _share_column(series: pd.Series, blocks: list) -> dict:
+    if isinstance(series.dtype, pd.CategoricalDtype) or not (
+        pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_dtype(series)
+    ):
+        categorical = pd.Categorical(series)
+        return {"kind": "categorical", "codes": _share_array(categorical.codes, blocks),
+                "categories": categorical.categories.tolist(), "ordered": bool(categorical.ordered)}
+    return {"kind": "array", "values": _share_array(series.to_numpy(), blocks)}
+
+
+def _share_frame(df: pd.DataFrame, blocks: list) -> dict:
+    has_index = not isinstance(df.index, pd.RangeIndex)
+    flat = df.reset_index() if has_index else df
+    return {
+        "type": "frame",
+        # reset_index() puts the index levels first
+        "index": list(flat.columns[:df.index.nlevels]) if has_index else [],
+        "index_names": list(df.index.names),
+        "columns": [[name, _share_column(flat[name], blocks)] for name in flat.columns],
+    }
+
+
+def _share_value(value, blocks: list) -> dict:
+    if isinstance(value, pd.DataFrame):
+        return _share_frame(value, blocks)
+    if isinstance(value, dict) and value and all(isinstance(v, pd.DataFrame) for v in value.values()):
+        return {"type": "frames", "frames": {k: _share_frame(v, blocks) for k, v in value.items()}}
+    return {"type": "json", "value": value}
+
+
+def publish(loaded: dict) -> tuple:
+    """Copy every loaded value into shared memory. Returns (manifest, blocks)."""
+    blocks = []
+    manifest = {"pid": os.getpid(), "values": {name: _share_value(v, blocks) for name, v in loaded.items()}}
+    return manifest, blocks
+
+
+def release(blocks: list):
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+# ======================================================
+# ATTACH (worker processes)
+# ======================================================
+
+def _attach_array(spec: dict) -> np.ndarray:
+    block = shared_memory.SharedMemory(name=spec["shm"])
+    # Only the loader may unlink the block; before Python 3.13 attaching also
+    # registers it with this process's resource tracker, which would unlink it
+    # when the worker exits. Windows has no tracker for shared memory.
+    if os.name == "posix":
+        resource_tracker.unregister(block._name, "shared_memory")
+    _attached.append(block)
+    values = np.ndarray(spec["shape"], dtype=np.dtype(spec["dtype"]), buffer=block.buf)
+    values.flags.writeable = False
+    return values
+
+
+def _attach_column(spec: dict):
+    if spec["kind"] == "categorical":
+        dtype = pd.CategoricalDtype(spec["categories"], ordered=spec["ordered"])
+        return pd.Categorical.from_codes(_attach_array(spec["codes"]), dtype=dtype)
+    return _attach_array(spec["values"])
+
+
+def _attach_frame(spec: dict) -> pd.DataFrame:
+    df = pd.DataFrame({name: _attach_column(c) for name, c in spec["columns"]}, copy=False)
+    if spec["index"]:
+        df = df.set_index(spec["index"])
+        df.index.names = spec["index_names"]
+    return df
+
+
+def _attach_value(spec: dict):
+    if spec["type"] == "frame":
+        return _attach_frame(spec)
+    if spec["type"] == "frames":
+        return {k: _attach_frame(v) for k, v in spec["frames"].items()}
+    return spec["value"]
+
+
+def attach(manifest_path) -> dict:
+    """The loaded values published under `manifest_path`, as zero-copy views."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return {name: _attach_value(spec) for name, spec in manifest["values"].items()}
+
+
+# ======================================================
+# LOADER PROCESS
+# ======================================================
+
+def serve(manifest_path: Path = DEFAULT_MANIFEST):
+    """Load everything, publish it and keep the blocks alive until interrupted."""
+    from loaders import load_all
+
+    start = time.perf_counter()
+    loaded, _ = load_all()
+    manifest, blocks = publish(loaded)
+    size = sum(b.size for b in blocks)
+
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    print(f"Published {len(blocks)} blocks ({size / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s")
+    print(f"Start workers with DASH_SHARED_STORE={manifest_path}")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        # Wait in short steps; a bare wait() can't be interrupted on Windows
+        while not stop.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manifest_path.unlink(missing_ok=True)
+        release(blocks)
+
+
+if __name__ == "__main__":
+    serve(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MANIFEST)
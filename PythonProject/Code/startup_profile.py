@@ -0,0 +1,133 @@
+"""
+startup_profile.py
+
+Reports where dash_app.py spends its startup time:
+- imports, attributed to top-level packages using `python -X importtime`
+- loading and figure building, from the phase timings recorded by
+  dashboard_data.py, with the load broken down into the CSV parsing,
+  GeoJSON parsing and aggregate tasks run by loaders.py
+- optionally, the time until the server answers /healthz
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+
+Usage: python startup_profile.py [--fast-start] [--serve]
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent
+
+# Health checks are expected to pass within this many seconds of launch
+HEALTH_BUDGET_S = 5.0
+TOP_N = 12
+
+PROBE = (
+    "import json, sys, dash_app; "
+    "d = sys.modules.get('dashboard_data'); "
+    "print(json.dumps([getattr(d, 'TIMINGS', {}), getattr(d, 'LOAD_TIMINGS', {})]))"
+)
+
+
+def _env(fast_start: bool) -> dict:
+    env = dict(os.environ)
+    env.pop("DASH_FAST_START", None)
+    if fast_start:
+        env["DASH_FAST_START"] = "1"
+    return env
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Sum `-X importtime` self times (in seconds) per top-level package.
+
+    The project's own modules are left out: their self time is the module
+    body running (loading data, building figures), which the phases cover.
+    """
+    totals = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        if not (CODE_DIR / f"{package}.py").exists():
+            totals[package] += int(self_us) / 1e6
+    return dict(totals)
+
+
+def profile_startup(fast_start: bool = False) -> tuple:
+    """Import dash_app in a fresh interpreter.
+
+    Returns (import times, phase times, load task times, wall time).
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=CODE_DIR, env=_env(fast_start), capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    phases, load_tasks = json.loads(result.stdout.strip().splitlines()[-1])
+    return parse_importtime(result.stderr), phases, load_tasks, wall
+
+
+def time_to_healthy(fast_start: bool = False, budget: float = HEALTH_BUDGET_S):
+    """Launch the server and return the seconds until /healthz answers (None if over budget)."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    env = _env(fast_start)
+    env["PORT"] = str(port)
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "dash_app.py"], cwd=CODE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < budget:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+        return None
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    fast_start = "--fast-start" in sys.argv
+    imports, phases, load_tasks, wall = profile_startup(fast_start)
+
+    print(f"Startup profile ({'fast-start' if fast_start else 'default'} mode), "
+          f"total {wall:.2f}s including interpreter start\n")
+
+    print("Imports by package (self time):")
+    for name, seconds in sorted(imports.items(), key=lambda kv: -kv[1])[:TOP_N]:
+        print(f"  {name:<24} {seconds:7.3f}s")
+    print(f"  {'all imports':<24} {sum(imports.values()):7.3f}s\n")
+
+    if phases:
+        print("Startup phases (wall time, includes any imports they trigger):")
+        for phase, seconds in phases.items():
+            print(f"  {phase:<24} {seconds:7.3f}s")
+        print("\nLoad tasks (run concurrently, so they overlap):")
+        for task, seconds in sorted(load_tasks.items(), key=lambda kv: -kv[1]):
+            print(f"  {task:<24} {seconds:7.3f}s")
+    else:
+        print("No data loaded at startup (deferred until first use).")
+
+    if "--serve" in sys.argv:
+        elapsed = time_to_healthy(fast_start)
+        if elapsed is None:
+            print(f"\n/healthz did not answer within the {HEALTH_BUDGET_S:.0f}s budget")
+        else:
+            print(f"\n/healthz answered after {elapsed:.2f}s (budget {HEALTH_BUDGET_S:.0f}s)")
@@ -0,0 +1,19 @@
+"""
+tabs.py
+
+The dashboard views, shared by dash_app.py and build_report.py without
+either importing the other (or loading any data).
+"""
+
+# (tab value, label); the values are the keys of dashboard_data.FIGURES
+TABS = [
+    ("tab_scatter_age", "Pass Rate vs Age"),
+    ("tab_pass_map", "Pass Rate Map"),
+    ("tab_age_map", "Average Age Map"),
+    ("tab_tests_map", "Tests Map"),
+    ("tab_pass_tests", "Pass Rate vs Tests"),
+    ("tab_monthly", "Monthly Trends"),
+    ("tab_anomalies", "Anomalies"),
+    ("tab_forecast", "Test Forecast"),
+    ("tab_correlations", "Correlations"),
+]
@@ -0,0 +1,161 @@
+"""
+validation.py
+
+Checks each input against a declared schema as soon as it is read, so bad
+data fails before any aggregation instead of silently dropping out later
+(a misspelt month, a text value in Pass Rate, an unknown category, ...).
+
+Every check works on whole columns. Checks on text columns (allowed values,
+month format) only look at each column's distinct values, which are few
+even in multi-million-row files, so validation adds very little load time.
+
+Usage: python validation.py [n_synthetic_rows]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+CATEGORIES = [
+    "Category A (Motorcycle All)",
+    "Category B (Car or light van)",
+    "Category C (Truck)",
+]
+
+ROA30_SCHEMA = {
+    "Month": {"required": True, "format": "%Y %B"},
+    "Driving Test Categories": {"required": True, "allowed": CATEGORIES},
+    "Driving Test Centre": {"required": True},
+    "Pass Rate": {"numeric": True, "min": 0, "max": 100},
+    "Number of Tests": {"numeric": True, "min": 0, "integer": True},
+}
+
+# Source name (as used in loaders.py) -> {column: checks}
+SCHEMAS = {
+    "df_driving": ROA30_SCHEMA,
+    "df_monthly": ROA30_SCHEMA,
+    "df_age": {
+        "County and State": {"required": True},
+        "VALUE": {"numeric": True, "min": 0, "max": 120},
+    },
+    "df_population": {
+        "County": {"required": True},
+        "UNIT": {"allowed": ["Thousand"]},
+        "VALUE": {"numeric": True, "min": 0},
+    },
+}
+
+MAX_EXAMPLES = 3
+
+
+class ValidationError(ValueError):
+    """Raised with the full violation report when a source fails its schema."""
+
+    def __init__(self, source: str, violations: list):
+        self.source = source
+        self.violations = violations
+        super().__init__(format_report(source, violations))
+
+
+def format_report(source: str, violations: list) -> str:
+    lines = [f"{source}: {len(violations)} schema violation(s)"]
+    for v in violations:
+        examples = ", ".join(repr(e) for e in v["examples"])
+        lines.append(f"  {v['column']}: {v['check']} ({v['count']} rows)" + (f" e.g. {examples}" if examples else ""))
+    return "\n".join(lines)
+
+
+def _violation(violations, column, check, mask, values):
+    count = int(mask.sum())
+    if count:
+        # Only failing rows are ever pulled out of the column
+        examples = pd.unique(values[mask])[:MAX_EXAMPLES].tolist()
+        violations.append({"column": column, "check": check, "count": count, "examples": examples})
+
+
+def _check_distinct(violations, column, series, check, is_valid):
+    # Decide validity once per distinct value, then broadcast back to the rows
+    codes, uniques = pd.factorize(series)
+    valid = np.append(is_valid(pd.Series(uniques)), True)  # code -1 (missing) is not checked here
+    _violation(violations, column, check, ~valid[codes], series)
+
+
+def check_frame(df: pd.DataFrame, schema: dict) -> list:
+    """Return the list of violations of `schema` in `df` (empty if it conforms)."""
+    violations = []
+    missing = [c for c in schema if c not in df.columns]
+    if missing:
+        violations.append({"column": ", ".join(missing), "check": "missing column, file has",
+                           "count": len(df), "examples": list(df.columns[:MAX_EXAMPLES])})
+
+    for column, checks in schema.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+
+        if checks.get("required"):
+            _violation(violations, column, "missing value", series.isna().to_numpy(), series)
+
+        if checks.get("numeric"):
+            values = series
+            if not pd.api.types.is_numeric_dtype(series):
+                values = pd.to_numeric(series, errors="coerce")
+                _violation(violations, column, "not a number",
+                           (values.isna() & series.notna()).to_numpy(), series)
+            values = values.to_numpy(dtype=float)
+            with np.errstate(invalid="ignore"):
+                if "min" in checks:
+                    _violation(violations, column, f"below {checks['min']}", values < checks["min"], values)
+                if "max" in checks:
+                    _violation(violations, column, f"above {checks['max']}", values > checks["max"], values)
+                if checks.get("integer"):
+                    _violation(violations, column, "not a whole number",
+                               np.isfinite(values) & (values != np.round(values)), values)
+
+        if "allowed" in checks:
+            allowed = set(checks["allowed"])
+            _check_distinct(violations, column, series, "unexpected value",
+                            lambda u: u.isin(allowed).to_numpy())
+
+        if "format" in checks:
+            fmt = checks["format"]
+            _check_distinct(violations, column, series, f"does not match {fmt!r}",
+                            lambda u: pd.to_datetime(u, format=fmt, errors="coerce").notna().to_numpy())
+
+    return violations
+
+
+def validate(source: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Check `df` against the schema for `source`; raise ValidationError on any violation."""
+    violations = check_frame(df, SCHEMAS[source])
+    if violations:
+        raise ValidationError(source, violations)
+    return df
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    rng = np.random.default_rng(0)
+    months = pd.date_range("2021-01-01", periods=58, freq="MS").strftime("%Y %B")
+    df = pd.DataFrame({
+        "Month": months[rng.integers(0, len(months), n)],
+        "Driving Test Categories": np.array(CATEGORIES)[rng.integers(0, 3, n)],
+        "Driving Test Centre": "Athlone, Co. Westmeath",
+        "Pass Rate": rng.uniform(0, 100, n).round(1),
+        "Number of Tests": rng.integers(0, 1500, n).astype(float),
+    })
+
+    start = time.perf_counter()
+    violations = check_frame(df, ROA30_SCHEMA)
+    print(f"Validated {n:,} clean rows in {time.perf_counter() - start:.3f}s, "
+          f"{len(violations)} violations")
+
+    df.loc[[1, 2], "Month"] = "2021 Janury"
+    df.loc[3, "Pass Rate"] = 140.0
+    df.loc[4, "Driving Test Categories"] = "Category D (Bus)"
+    start = time.perf_counter()
+    violations = check_frame(df, ROA30_SCHEMA)
+    print(f"Validated {n:,} rows with injected errors in {time.perf_counter() - start:.3f}s")
+    print(format_report("synthetic", violations))